@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+# Agregados das leituras em várias resoluções (5 min, 1 hora, 1 dia).
+#
+# Visões de períodos longos ("últimos 7 dias", "último mês") não precisam das
+# leituras brutas: para cada sensor e resolução calculamos min/max/média/última
+# e quantidade de leituras de distância, cota, % alerta e temperatura.
+#
+# Os agregados são mantidos por dia, em acumuladores por intervalo (mínimo,
+# máximo, soma, quantidade e última leitura com o seu instante). Um dia é
+# agregado a partir do arquivo do armazém local (armazem.py) só na primeira
+# consulta; depois, as leituras que a sincronização grava entram nos
+# acumuladores já carregados, sem reagregar o dia. Nos workers que não
+# sincronizam, as leituras acrescentadas ao arquivo (posteriores à última já
+# acumulada) entram do mesmo jeito. Uma consulta por período junta os agregados
+# dos dias pedidos, então "último mês" em resolução horária custa ~720 linhas.
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from armazem import armazem_local
+from incremental import leituras_recentes
+from normalizacao import agora, normalizar, para_instante
+from reducao import PONTOS_GRAFICO
+
+COLUNAS = ["distancia", "cota", "percentual_alerta", "temperatura"]
+ESTATISTICAS = ["min", "max", "mean", "last", "count"]
+
+# Resoluções disponíveis (da mais fina para a mais grossa) -> frequência do pandas
+RESOLUCOES = {
+    "5min": "5min",
+    "1h": "1h",
+    "1d": "1D",
+}
+
+# Dias (sensor + dia) com acumuladores em memória; os mais antigos são
+# descartados e voltam a ser agregados do arquivo se forem consultados de novo
+_MAX_DIAS = 1024
+
+
+def _acumular(df, resolucao):
+    # Acumuladores por intervalo das leituras de `df` (já normalizado)
+    df = df.sort_values("instante", kind="stable")
+    inicio = df["instante"].dt.floor(RESOLUCOES[resolucao]).rename("inicio")
+    partes = {}
+    for coluna in COLUNAS:
+        if coluna not in df.columns:
+            continue
+        valores = df[coluna].astype("float64")
+        grupos = valores.groupby(inicio, sort=True)
+        partes[f"{coluna}_min"] = grupos.min()
+        partes[f"{coluna}_max"] = grupos.max()
+        partes[f"{coluna}_sum"] = grupos.sum()
+        partes[f"{coluna}_count"] = grupos.count()
+        partes[f"{coluna}_last"] = grupos.last()
+        # Instante da última leitura preenchida: leituras atrasadas podem
+        # chegar depois de outras mais novas do mesmo intervalo
+        partes[f"{coluna}_t"] = df["instante"].where(valores.notna()).groupby(inicio, sort=True).max()
+    return pd.DataFrame(partes)
+
+
+def _mesclar(a, b):
+    # Soma os acumuladores `b` (leituras novas) aos de `a`
+    if a is None or a.empty:
+        return b
+    if b.empty:
+        return a
+    indice = a.index.union(b.index)
+    a, b = a.reindex(indice), b.reindex(indice)
+    partes = {}
+    for coluna in COLUNAS:
+        if f"{coluna}_min" not in a.columns:
+            continue
+        partes[f"{coluna}_min"] = np.fmin(a[f"{coluna}_min"], b[f"{coluna}_min"])
+        partes[f"{coluna}_max"] = np.fmax(a[f"{coluna}_max"], b[f"{coluna}_max"])
+        partes[f"{coluna}_sum"] = a[f"{coluna}_sum"].fillna(0) + b[f"{coluna}_sum"].fillna(0)
+        partes[f"{coluna}_count"] = (a[f"{coluna}_count"].fillna(0) + b[f"{coluna}_count"].fillna(0)).astype("int64")
+        # Comparação com NaT é falsa: sem última leitura em `a`, vale a de `b`
+        usar_b = b[f"{coluna}_t"].notna() & ~(a[f"{coluna}_t"] >= b[f"{coluna}_t"])
+        partes[f"{coluna}_last"] = b[f"{coluna}_last"].where(usar_b, a[f"{coluna}_last"])
+        partes[f"{coluna}_t"] = b[f"{coluna}_t"].where(usar_b, a[f"{coluna}_t"])
+    return pd.DataFrame(partes)
+
+
+def _finalizar(acumulados):
+    # Acumuladores -> uma linha por intervalo, com `inicio` e `<coluna>_<estatistica>`
+    if acumulados is None or acumulados.empty:
+        return pd.DataFrame()
+    partes = {}
+    for coluna in COLUNAS:
+        if f"{coluna}_min" not in acumulados.columns:
+            continue
+        quantidade = acumulados[f"{coluna}_count"]
+        partes[f"{coluna}_min"] = acumulados[f"{coluna}_min"]
+        partes[f"{coluna}_max"] = acumulados[f"{coluna}_max"]
+        partes[f"{coluna}_mean"] = acumulados[f"{coluna}_sum"] / quantidade.where(quantidade > 0)
+        partes[f"{coluna}_last"] = acumulados[f"{coluna}_last"]
+        partes[f"{coluna}_count"] = quantidade
+    return pd.DataFrame(partes).rename_axis("inicio").reset_index()
+
+
+def agregar(df, resolucao):
+    """
+    Agrega as leituras brutas (coluna `instante` + COLUNAS) por intervalos da
+    resolução. Retorna uma linha por intervalo, com a coluna `inicio` e as
+    colunas `<coluna>_<estatistica>`.
+    """
+    if df is None or df.empty:
+        return pd.DataFrame()
+    return _finalizar(_acumular(normalizar(df), resolucao))
+
+
+class _Dia:
+    """Acumuladores de um dia do sensor, em todas as resoluções."""
+
+    def __init__(self, versao):
+        self.versao = versao  # mtime do arquivo já acumulado
+        self.linhas = 0
+        self.ultimo = None  # instante da leitura mais recente acumulada
+        self.acumulados = dict.fromkeys(RESOLUCOES)
+        self.prontos = {}
+
+    def absorver(self, df, versao):
+        self.versao = versao
+        if df is None or df.empty:
+            return
+        for resolucao in RESOLUCOES:
+            self.acumulados[resolucao] = _mesclar(self.acumulados[resolucao], _acumular(df, resolucao))
+        self.linhas += len(df)
+        maior = df["instante"].max()
+        self.ultimo = maior if self.ultimo is None else max(self.ultimo, maior)
+        self.prontos = {}
+
+    def agregado(self, resolucao):
+        if resolucao not in self.prontos:
+            self.prontos[resolucao] = _finalizar(self.acumulados[resolucao])
+        return self.prontos[resolucao]
+
+
+class AgregadosPorDia:
+    """
+    Agregados de cada dia dos sensores, atualizados a cada gravação do
+    armazém local em vez de recalculados a partir dos arquivos.
+    """
+
+    def __init__(self, armazem, max_dias=_MAX_DIAS):
+        self.armazem = armazem
+        self.max_dias = max_dias
+        self._dias = OrderedDict()
+        self._lock = threading.Lock()
+        armazem.ao_gravar(self._gravado)
+
+    def _gravado(self, nome, dia, linhas, versao):
+        # Chamado pela sincronização deste processo: só dias já carregados
+        # são atualizados; os demais serão agregados do arquivo quando pedidos
+        with self._lock:
+            estado = self._dias.get((nome, dia))
+            if estado is None:
+                return
+            if linhas is None:
+                del self._dias[(nome, dia)]  # leituras já gravadas mudaram de valor
+            else:
+                estado.absorver(linhas, versao)
+
+    def _carregar(self, nome, dia, estado, versao):
+        df = self.armazem.ler_dia(nome, dia)
+        if estado is not None and df is not None and estado.ultimo is not None:
+            # Gravado por outro worker: se o arquivo só ganhou leituras
+            # posteriores às já acumuladas, basta acrescentá-las
+            novas = df[df["instante"] > estado.ultimo]
+            if len(df) - len(novas) == estado.linhas:
+                estado.absorver(novas, versao)
+                return estado
+        estado = _Dia(versao)
+        estado.absorver(df, versao)
+        return estado
+
+    def agregado(self, nome, dia, resolucao):
+        """Agregados do sensor no dia (AAAA-MM-DD) na resolução pedida."""
+        versao = self.armazem.versao_dia(nome, dia)
+        if versao is None:
+            return pd.DataFrame()
+        chave = (str(nome), dia)
+        with self._lock:
+            estado = self._dias.get(chave)
+            if estado is None or estado.versao != versao:
+                estado = self._carregar(nome, dia, estado, versao)
+                self._dias[chave] = estado
+            self._dias.move_to_end(chave)
+            while len(self._dias) > self.max_dias:
+                self._dias.popitem(last=False)
+            return estado.agregado(resolucao)
+
+
+# Instância compartilhada pelo app (atualizada pela sincronização do armazém)
+agregados_dias = AgregadosPorDia(armazem_local)
+
+
+def escolher_resolucao(inicio, fim, max_pontos=None):
+    """
+    Resolução mais fina cujo número de intervalos no período não passa de
+    `max_pontos` (ou a mais grossa, se nenhuma couber).
+    """
+    max_pontos = max_pontos or PONTOS_GRAFICO
+    duracao = fim - inicio
+    for resolucao, frequencia in RESOLUCOES.items():
+        if duracao / pd.Timedelta(frequencia) <= max_pontos:
+            return resolucao
+    return list(RESOLUCOES)[-1]
+
+
+def consultar(nome, inicio, fim=None, resolucao=None):
+    """
+    Agregados do sensor entre `inicio` e `fim` (datetimes). Sem `resolucao`,
+    usa `escolher_resolucao`. Retorna (resolucao, DataFrame ordenado por inicio).
+    """
+    inicio = para_instante(inicio)
+    fim = para_instante(fim or agora())
+    resolucao = resolucao or escolher_resolucao(inicio, fim)
+    if resolucao not in RESOLUCOES:
+        raise ValueError(f"Resolução inválida: {resolucao}")
+
+    if armazem_local.ativo:
+        # Os intervalos de todas as resoluções cabem dentro de um dia, então cada
+        # arquivo diário é agregado de forma independente
+        dia_inicio = inicio.strftime("%Y-%m-%d")
+        dia_fim = fim.strftime("%Y-%m-%d")
+        partes = []
+        for dia in armazem_local.dias_gravados(nome):
+            if dia_inicio <= dia <= dia_fim:
+                partes.append(agregados_dias.agregado(nome, dia, resolucao))
+        partes = [df for df in partes if not df.empty]
+        df = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+    else:
+        # Sem o armazém local, agrega o que houver no buffer em memória
+        df = agregar(leituras_recentes.historico(nome), resolucao)
+
+    if df.empty:
+        return resolucao, df
+    inicio_intervalo = inicio.floor(RESOLUCOES[resolucao])
+    df = df[(df["inicio"] >= inicio_intervalo) & (df["inicio"] <= fim)]
+    return resolucao, df.sort_values("inicio").reset_index(drop=True)
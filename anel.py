@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+# Buffer circular (ring buffer) das leituras recentes de um sensor.
+#
+# Em vez de um DataFrame novo a cada mescla, cada sensor tem arrays NumPy
+# pré-alocados: instantes (int64, ns desde a época, UTC) e um array float32 por
+# coluna numérica. Cada leitura é gravada duas vezes, nas posições i e
+# i + capacidade; assim as últimas n leituras sempre formam um trecho contíguo e
+# qualquer recorte (últimas n, desde um instante) é uma única fatia dos arrays.
+# Acrescentar uma leitura nova é O(1).
+#
+# Leituras atrasadas (que chegam pelo lookback com instante anterior à última
+# gravada) entram na posição certa: o trecho final a partir da mais antiga delas
+# é regravado em ordem, sem duplicar instantes já gravados.
+#
+# Cada buffer tem um contador de gravações (`versao`) que sobe a cada lote que
+# grava alguma leitura, inclusive as atrasadas (que não mudam a última). Ele
+# começa no relógio (ns) da criação do buffer, para não repetir valores já
+# vistos pelos navegadores depois de um reinício. `versao_atrasadas` guarda o
+# contador da última gravação que inseriu leituras fora de ordem: quem exibe
+# só o que veio depois da última leitura vista sabe que precisa recomeçar.
+#
+# Há um único escritor (a busca incremental) e vários leitores em outras
+# threads. Como uma gravação pode sobrescrever posições já lidas (buffer cheio
+# ou leituras atrasadas), escrita e leitura usam o mesmo lock e os leitores
+# recebem cópias dos recortes, nunca views dos arrays internos.
+import threading
+import time
+
+import numpy as np
+
+
+class BufferCircular:
+    """
+    Últimas `capacidade` leituras de um sensor, em ordem crescente de instante.
+    """
+
+    def __init__(self, capacidade, colunas):
+        self.capacidade = int(capacidade)
+        self.colunas = tuple(colunas)
+        self._instantes = np.zeros(2 * self.capacidade, dtype="int64")
+        self._valores = {c: np.full(2 * self.capacidade, np.nan, dtype="float32") for c in self.colunas}
+        self._estado = (0, 0)  # (próxima posição de escrita, quantidade de leituras)
+        self._versao = time.time_ns()
+        self._versao_atrasadas = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def restaurar(cls, capacidade, colunas, instantes, valores, versao, versao_atrasadas=None):
+        """Buffer com as leituras dadas e os contadores publicados por outro processo."""
+        anel = cls(capacidade, colunas)
+        anel.acrescentar(instantes, valores)
+        anel._versao, anel._versao_atrasadas = versao, versao_atrasadas
+        return anel
+
+    def __len__(self):
+        return self._estado[1]
+
+    @property
+    def ultimo(self):
+        """Instante (ns, UTC) da leitura mais recente, ou None se vazio."""
+        with self._lock:
+            posicao, quantidade = self._estado
+            if not quantidade:
+                return None
+            return int(self._instantes[posicao + self.capacidade - 1])
+
+    @property
+    def versao(self):
+        """Contador de gravações: muda a cada lote que grava alguma leitura."""
+        return self._versao
+
+    @property
+    def versao_atrasadas(self):
+        """Contador da última gravação com leituras atrasadas, ou None se não houve."""
+        return self._versao_atrasadas
+
+    def acrescentar(self, instantes, valores):
+        """
+        Acrescenta um lote: `instantes` em ns (int64) e `valores` =
+        {coluna: array}. Leituras com instante já gravado são ignoradas (ex.:
+        as que voltam pelo lookback); as atrasadas entram na posição certa.
+        Retorna quantas leituras foram gravadas.
+        """
+        instantes = np.asarray(instantes, dtype="int64")
+        lote = {
+            c: np.asarray(valores[c], dtype="float32") if c in valores else np.full(len(instantes), np.nan, dtype="float32")
+            for c in self.colunas
+        }
+        # Ordena o lote e descarta instantes repetidos dentro dele
+        instantes, unicos = np.unique(instantes, return_index=True)
+        lote = {c: v[unicos] for c, v in lote.items()}
+
+        with self._lock:
+            trecho = self._trecho()
+            gravados = self._instantes[trecho]
+            novas = ~np.isin(instantes, gravados)
+            if len(gravados) == self.capacidade:
+                # Buffer cheio: o que é mais antigo que tudo o que está nele não cabe
+                novas &= instantes > gravados[0]
+            instantes = instantes[novas]
+            lote = {c: v[novas] for c, v in lote.items()}
+            n = len(instantes)
+            if not n:
+                return 0
+
+            atrasadas = bool(len(gravados)) and instantes[0] < gravados[-1]
+            if atrasadas:
+                # Leituras atrasadas: regrava, em ordem, o trecho final a partir
+                # da mais antiga delas
+                inicio = int(np.searchsorted(gravados, instantes[0]))
+                ordem = np.argsort(np.concatenate([gravados[inicio:], instantes]), kind="stable")
+                instantes = np.concatenate([gravados[inicio:], instantes])[ordem]
+                lote = {
+                    c: np.concatenate([self._valores[c][trecho][inicio:], v])[ordem]
+                    for c, v in lote.items()
+                }
+                posicao, quantidade = self._estado
+                recuo = quantidade - inicio
+                self._estado = ((posicao - recuo) % self.capacidade, inicio)
+
+            self._gravar(instantes, lote)
+            self._versao += 1
+            if atrasadas:
+                self._versao_atrasadas = self._versao
+        return n
+
+    def _gravar(self, instantes, valores):
+        # Grava o lote (ordenado, mais novo que tudo o que está no buffer) a
+        # partir da posição atual; um lote maior que a capacidade só precisa
+        # das últimas leituras
+        inicio_lote = max(0, len(instantes) - self.capacidade)
+        instantes = instantes[inicio_lote:]
+
+        posicao, quantidade = self._estado
+        indices = (posicao + np.arange(len(instantes))) % self.capacidade
+        espelho = indices + self.capacidade
+        self._instantes[indices] = instantes
+        self._instantes[espelho] = instantes
+        for coluna in self.colunas:
+            lote = valores[coluna][inicio_lote:]
+            self._valores[coluna][indices] = lote
+            self._valores[coluna][espelho] = lote
+
+        self._estado = ((posicao + len(instantes)) % self.capacidade,
+                        min(quantidade + len(instantes), self.capacidade))
+
+    def _trecho(self, n=None):
+        posicao, quantidade = self._estado
+        n = quantidade if n is None else max(0, min(n, quantidade))
+        fim = posicao + self.capacidade
+        return slice(fim - n, fim)
+
+    def ultimos(self, n=None):
+        """
+        Cópias das últimas `n` leituras (todas, se n=None):
+        (instantes, {coluna: valores}).
+        """
+        with self._lock:
+            trecho = self._trecho(n)
+            return self._instantes[trecho].copy(), {c: v[trecho].copy() for c, v in self._valores.items()}
+
+    def desde(self, instante_ns):
+        """Cópias das leituras com instante >= `instante_ns` (ns, UTC)."""
+        with self._lock:
+            trecho = self._trecho()
+            inicio = trecho.start + int(np.searchsorted(self._instantes[trecho], instante_ns, side="left"))
+            trecho = slice(inicio, trecho.stop)
+            return self._instantes[trecho].copy(), {c: v[trecho].copy() for c, v in self._valores.items()}
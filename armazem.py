@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+# Armazém local de séries temporais (espelho de dados_sensores em Parquet).
+#
+# As leituras de histórico não precisam atravessar o link com o SQL Server a
+# cada consulta. Um job de sincronização (uma thread por worker) busca só as
+# leituras novas de cada sensor, a partir da última leitura já gravada em disco
+# (voltando alguns minutos para pegar leituras atrasadas), e grava em arquivos
+# Parquet particionados por sensor e por dia:
+#
+#     <ARMAZEM_DIR>/<sensor>/<AAAA-MM-DD>.parquet
+#
+# Consultas de histórico leem apenas os arquivos dos dias pedidos. Dias que já
+# terminaram não mudam mais, então a leitura de cada arquivo fica em cache
+# (pelo caminho e mtime). Os workers do gunicorn compartilham o mesmo diretório:
+# só o worker líder (compartilhado.py) sincroniza, um lock de arquivo garante
+# que nunca há duas sincronizações ao mesmo tempo, e cada arquivo
+# é gravado num temporário e trocado com os.replace (leitores nunca veem um
+# arquivo pela metade).
+#
+# O pyarrow é opcional: sem ele o armazém fica desativado, as leituras retornam
+# DataFrames vazios e quem usa o armazém continua consultando o banco.
+import os
+import threading
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import pandas as pd
+from sqlalchemy import text
+
+from compartilhado import lideranca
+from db import ler_sql
+from normalizacao import COLUNAS_NUMERICAS, normalizar, para_banco, para_instante
+from sensores import sensores_ativos
+from tarefas import TarefaPeriodica
+
+try:
+    import pyarrow  # noqa: F401  (engine do pandas para Parquet)
+    PARQUET_DISPONIVEL = True
+except ImportError:
+    PARQUET_DISPONIVEL = False
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos
+    fcntl = None
+
+ARMAZEM_DIR = os.environ.get(
+    "ARMAZEM_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "dados"),
+)
+ARMAZEM_DIAS = int(os.environ.get("ARMAZEM_DIAS", "30"))              # carga inicial (dias)
+ARMAZEM_LOOKBACK_MIN = int(os.environ.get("ARMAZEM_LOOKBACK_MIN", "10"))
+ARMAZEM_INTERVALO = int(os.environ.get("ARMAZEM_INTERVALO", "60"))    # intervalo da sincronização (s)
+
+# Colunas que identificam uma leitura (usadas para remover duplicadas na mescla)
+CHAVE_LEITURA = ["instante"]
+
+
+@lru_cache(maxsize=512)
+def _ler_arquivo(caminho, mtime_ns):
+    # O mtime faz parte da chave: um arquivo regravado é relido. Arquivos
+    # gravados antes da normalização (sem `instante`, valores em texto) são
+    # normalizados na leitura.
+    return normalizar(pd.read_parquet(caminho))
+
+
+def _alteradas(atual, repetidas):
+    # True se leituras recebidas de novo (janela de lookback) vieram com
+    # valores diferentes dos já gravados
+    colunas = [coluna for coluna in COLUNAS_NUMERICAS if coluna in atual.columns and coluna in repetidas.columns]
+    gravadas = atual.drop_duplicates(subset=CHAVE_LEITURA, keep="last").set_index("instante")
+    gravadas = gravadas.loc[repetidas["instante"], colunas].reset_index(drop=True)
+    return not gravadas.equals(repetidas[colunas].reset_index(drop=True))
+
+
+class ArmazemLocal:
+    """
+    Arquivos Parquet por sensor e por dia, sincronizados incrementalmente
+    com o banco.
+    """
+
+    def __init__(self, diretorio, dias=30, lookback_minutos=10, intervalo=60):
+        self.diretorio = diretorio
+        self.dias = dias
+        self.lookback = timedelta(minutes=lookback_minutos)
+        self.ativo = PARQUET_DISPONIVEL
+        self.linhas_ultima_sincronizacao = 0
+        self.ultima_sincronizacao = None
+        self._ao_gravar = []
+        self._lock = threading.Lock()
+        self._tarefa = TarefaPeriodica(self.sincronizar, intervalo, nome="armazem-sync")
+
+    def iniciar(self):
+        """Inicia a thread de sincronização (apenas uma vez por processo)."""
+        if not self.ativo:
+            print("[armazem] pyarrow não instalado: armazém local desativado")
+            return
+        os.makedirs(self.diretorio, exist_ok=True)
+        self._tarefa.iniciar()
+
+    def parar(self):
+        self._tarefa.parar()
+
+    def ao_gravar(self, funcao):
+        """
+        Registra `funcao(nome, dia, linhas, versao)`, chamada neste processo
+        depois de cada gravação de um dia: `linhas` são as leituras
+        acrescentadas ao arquivo (None se leituras já gravadas mudaram de
+        valor) e `versao` é o novo `versao_dia`.
+        """
+        self._ao_gravar.append(funcao)
+
+    # === ARQUIVOS ===
+    def _pasta(self, nome):
+        return os.path.join(self.diretorio, str(nome))
+
+    def dias_gravados(self, nome):
+        """Dias (AAAA-MM-DD) com arquivo gravado para o sensor, em ordem crescente."""
+        try:
+            arquivos = os.listdir(self._pasta(nome))
+        except FileNotFoundError:
+            return []
+        return sorted(a[:-len(".parquet")] for a in arquivos if a.endswith(".parquet"))
+
+    def ler_dia(self, nome, dia):
+        """Leituras gravadas de um dia do sensor (ou None se o arquivo não existir)."""
+        caminho = os.path.join(self._pasta(nome), f"{dia}.parquet")
+        try:
+            return _ler_arquivo(caminho, os.stat(caminho).st_mtime_ns)
+        except FileNotFoundError:
+            return None
+
+    def versao_dia(self, nome, dia):
+        """Identifica o conteúdo atual do arquivo do dia (mtime em ns), ou None."""
+        try:
+            return os.stat(os.path.join(self._pasta(nome), f"{dia}.parquet")).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _gravar_dia(self, nome, dia, novas):
+        atual = self.ler_dia(nome, dia)
+        novas = novas.drop_duplicates(subset=CHAVE_LEITURA, keep="last")
+        if atual is None or atual.empty:
+            df, acrescentadas = novas, novas
+        else:
+            repetidas = novas["instante"].isin(atual["instante"])
+            acrescentadas = novas[~repetidas].reset_index(drop=True)
+            if repetidas.any() and _alteradas(atual, novas[repetidas]):
+                acrescentadas = None
+            df = pd.concat([atual, novas], ignore_index=True)
+        df = df.drop_duplicates(subset=CHAVE_LEITURA, keep="last")
+        df = df.sort_values(CHAVE_LEITURA, kind="stable").reset_index(drop=True)
+        os.makedirs(self._pasta(nome), exist_ok=True)
+        caminho = os.path.join(self._pasta(nome), f"{dia}.parquet")
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        df.to_parquet(temporario, index=False)
+        os.replace(temporario, caminho)
+        versao = os.stat(caminho).st_mtime_ns
+        for funcao in self._ao_gravar:
+            try:
+                funcao(nome, dia, acrescentadas, versao)
+            except Exception as e:
+                print(f"[armazem] Erro ao avisar a gravação de {nome} {dia}: {e}")
+
+    def marca(self, nome):
+        """Instante da leitura mais recente gravada para o sensor (ou None)."""
+        dias = self.dias_gravados(nome)
+        df = self.ler_dia(nome, dias[-1]) if dias else None
+        if df is None or df.empty:
+            return None
+        return df["instante"].iloc[-1]
+
+    # === SINCRONIZAÇÃO ===
+    def _montar_query(self, nomes):
+        # Mesma ideia da busca incremental: uma única query, com um filtro por
+        # sensor a partir da última leitura em disco (ou dos últimos `dias`).
+        clausulas = []
+        params = {"janela_dias": int(self.dias)}
+        for i, nome in enumerate(nomes):
+            params[f"nome_{i}"] = nome
+            marca = self.marca(nome)
+            if marca is None:
+                clausulas.append(
+                    f"(nome = :nome_{i} AND data >= DATEADD(day, -:janela_dias, CAST(GETDATE() AS date)))"
+                )
+            else:
+                params[f"desde_{i}"] = para_banco(marca - self.lookback)
+                clausulas.append(f"(nome = :nome_{i} AND data >= :desde_{i})")
+        query = text("SELECT * FROM dados_sensores WHERE " + " OR ".join(clausulas))
+        return query, params
+
+    def sincronizar(self):
+        """Busca as leituras novas no banco e grava nos arquivos de cada dia."""
+        if not self.ativo or not lideranca.e_lider():
+            return  # só o worker líder consulta o banco
+        os.makedirs(self.diretorio, exist_ok=True)
+        with self._lock, _LockArquivo(os.path.join(self.diretorio, ".sync.lock")) as obtido:
+            if not obtido:
+                return  # outro worker já está sincronizando
+            nomes = [s["nome"] for s in sensores_ativos()]
+            query, params = self._montar_query(nomes)
+            novas = ler_sql(query, params=params)
+            self.linhas_ultima_sincronizacao = len(novas)
+            if not novas.empty:
+                novas = normalizar(novas)
+                dias = novas["instante"].dt.strftime("%Y-%m-%d")
+                for (nome, dia), grupo in novas.groupby([novas["nome"].astype(str), dias], sort=False):
+                    if nome in nomes:
+                        self._gravar_dia(nome, dia, grupo.reset_index(drop=True))
+            self.ultima_sincronizacao = datetime.now()
+
+    # === LEITURA ===
+    def ler(self, nome, inicio=None, fim=None):
+        """
+        Leituras do sensor entre `inicio` e `fim` (datetimes, inclusive), em
+        ordem crescente de instante. DataFrame vazio se não houver nada em disco.
+        """
+        if not self.ativo:
+            return pd.DataFrame()
+        inicio = para_instante(inicio) if inicio is not None else None
+        fim = para_instante(fim) if fim is not None else None
+        dia_inicio = inicio.strftime("%Y-%m-%d") if inicio is not None else ""
+        dia_fim = fim.strftime("%Y-%m-%d") if fim is not None else "9999-12-31"
+        partes = [self.ler_dia(nome, dia) for dia in self.dias_gravados(nome) if dia_inicio <= dia <= dia_fim]
+        partes = [df for df in partes if df is not None and not df.empty]
+        if not partes:
+            return pd.DataFrame()
+        df = pd.concat(partes, ignore_index=True)
+        if inicio is not None:
+            df = df[df["instante"] >= inicio]
+        if fim is not None:
+            df = df[df["instante"] <= fim]
+        return df.reset_index(drop=True)
+
+    def ultimas(self, nome, n):
+        """As `n` leituras mais recentes do sensor (lendo só os últimos dias necessários)."""
+        if not self.ativo:
+            return pd.DataFrame()
+        partes, total = [], 0
+        for dia in reversed(self.dias_gravados(nome)):
+            df = self.ler_dia(nome, dia)
+            if df is None or df.empty:
+                continue
+            partes.append(df)
+            total += len(df)
+            if total >= n:
+                break
+        if not partes:
+            return pd.DataFrame()
+        return pd.concat(partes[::-1], ignore_index=True).tail(n).reset_index(drop=True)
+
+
+class _LockArquivo:
+    """Lock exclusivo e não bloqueante entre processos (fcntl.flock)."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._arquivo = None
+
+    def __enter__(self):
+        if fcntl is None:
+            return True
+        self._arquivo = open(self.caminho, "a")
+        try:
+            fcntl.flock(self._arquivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            self._arquivo.close()
+            self._arquivo = None
+            return False
+
+    def __exit__(self, *exc):
+        if self._arquivo is not None:
+            fcntl.flock(self._arquivo, fcntl.LOCK_UN)
+            self._arquivo.close()
+            self._arquivo = None
+
+
+# Instância compartilhada pelo app e pelas páginas de sensor
+armazem_local = ArmazemLocal(
+    ARMAZEM_DIR,
+    dias=ARMAZEM_DIAS,
+    lookback_minutos=ARMAZEM_LOOKBACK_MIN,
+    intervalo=ARMAZEM_INTERVALO,
+)
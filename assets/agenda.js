@@ -0,0 +1,44 @@
+// Agenda do polling (dcc.Interval) no navegador.
+//
+// - Cada intervalo só fica ligado na rota em que é usado: o do dashboard
+//   (interval-atualizacao) em "/", o de cada página de sensor na própria
+//   página; em /graficos e /config nenhum dispara.
+// - Com o canal de eventos conectado (assets/eventos.js), nenhum dispara.
+// - Com a aba oculta, o período é esticado (agenda-polling.oculto); quando a
+//   aba volta a ficar visível, o período normal volta e é feita uma busca
+//   imediata para alcançar o que mudou.
+(function () {
+    function avisarVisibilidade() {
+        if (window.dash_clientside && window.dash_clientside.set_props) {
+            window.dash_clientside.set_props("visibilidade", {data: {visivel: !document.hidden}});
+        }
+    }
+
+    window.dash_clientside = window.dash_clientside || {};
+    window.dash_clientside.agenda = {
+        agendar: function (rota, canal, visibilidade, idsSensor, agenda, nDashboard, nSensores) {
+            var nada = window.dash_clientside.no_update;
+            var contexto = window.dash_clientside.callback_context;
+            var disparos = (contexto.triggered || []).map(function (t) { return t.prop_id; });
+            var eventos = window.dash_clientside.eventos;
+            var conectado = Boolean(eventos && eventos.conectado());
+            var visivel = !document.hidden;
+            // Voltou a ficar visível: uma busca já, sem esperar o próximo período
+            var voltou = visivel && disparos.indexOf("visibilidade.data") >= 0;
+            var periodo = visivel ? agenda.intervalo : agenda.oculto;
+            var noDashboard = !rota || rota === "/";
+            idsSensor = idsSensor || [];
+            nSensores = nSensores || [];
+            return [
+                conectado || !noDashboard,
+                periodo,
+                voltou && noDashboard ? (nDashboard || 0) + 1 : nada,
+                idsSensor.map(function () { return conectado; }),
+                idsSensor.map(function () { return periodo; }),
+                idsSensor.map(function (id, i) { return voltou ? (nSensores[i] || 0) + 1 : nada; })
+            ];
+        }
+    };
+
+    document.addEventListener("visibilitychange", avisarVisibilidade);
+})();
@@ -0,0 +1,113 @@
+// Canal de atualizações empurradas pelo servidor (Server-Sent Events em /eventos).
+//
+// Cada mensagem traz só os sensores que mudaram (veja eventos.py), com os
+// valores dos cards e a versão da leitura mais recente de cada um, e é entregue
+// ao Dash pelo store "evento-servidor". Enquanto o canal está conectado, a
+// agenda do polling (assets/agenda.js) desliga os dcc.Interval; se a conexão
+// cair (ou o servidor recusar por estar lotado), eles voltam a funcionar.
+(function () {
+    var RECONEXAO_MS = 60000;  // nova tentativa depois de uma recusa
+    var canal = {conectado: false};
+    var leituras = {};  // última versão de leitura vista por sensor
+
+    function definirCanal(conectado) {
+        canal.conectado = conectado;
+        definir("canal-eventos", {data: {conectado: conectado}});
+    }
+
+    function definir(id, props) {
+        if (window.dash_clientside && window.dash_clientside.set_props) {
+            window.dash_clientside.set_props(id, props);
+        }
+    }
+
+    function conectar() {
+        if (!window.EventSource) {
+            return;  // navegador sem SSE: fica só o polling
+        }
+        var fonte = new EventSource("/eventos");
+        fonte.onopen = function () {
+            definirCanal(true);
+        };
+        fonte.onmessage = function (evento) {
+            definir("evento-servidor", {data: JSON.parse(evento.data)});
+        };
+        fonte.onerror = function () {
+            definirCanal(false);
+            // Erros de rede reconectam sozinhos; uma resposta de erro (ex.: 503) fecha o canal
+            if (fonte.readyState === EventSource.CLOSED) {
+                setTimeout(conectar, RECONEXAO_MS);
+            }
+        };
+    }
+
+    window.dash_clientside = window.dash_clientside || {};
+    window.dash_clientside.eventos = {
+        // Estado da conexão, consultado pela agenda do polling
+        conectado: function () {
+            return canal.conectado;
+        },
+
+        // Aplica nos cards do dashboard os valores recebidos pelo canal
+        cards: function (mensagem, estado, ids, estilosCota, estilosAlerta) {
+            var nada = window.dash_clientside.no_update;
+            if (!mensagem) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            estado = estado || {};
+            var novoEstado = Object.assign({}, estado);
+            var saidas = [[], [], [], [], []];
+            var mudou = false;
+            ids.forEach(function (id, i) {
+                var entrada = mensagem.sensores[id.sensor];
+                var card = entrada && entrada.cards;
+                if (!card || JSON.stringify(card) === JSON.stringify(estado[id.sensor])) {
+                    saidas.forEach(function (saida) { saida.push(nada); });
+                    return;
+                }
+                mudou = true;
+                novoEstado[id.sensor] = card;
+                saidas[0].push(card.distancia);
+                saidas[1].push(card.cota);
+                saidas[2].push(card.alerta);
+                saidas[3].push(Object.assign({}, estilosCota[i], {color: card.cor_cota}));
+                saidas[4].push(Object.assign({}, estilosAlerta[i], {color: card.cor_alerta}));
+            });
+            var cabecalho = "Última atualização: " + mensagem.hora;
+            if (mensagem.aviso) {
+                cabecalho = {
+                    namespace: "dash_html_components",
+                    type: "Span",
+                    props: {
+                        children: [
+                            {namespace: "dash_html_components", type: "I", props: {className: "fas fa-exclamation-triangle me-2"}},
+                            mensagem.aviso
+                        ],
+                        style: {color: "#FFA500"}
+                    }
+                };
+            }
+            return saidas.concat([cabecalho, mudou ? novoEstado : nada, mensagem.atualizado_em || nada]);
+        },
+
+        // Avisa as páginas de sensor abertas que chegaram leituras novas (a
+        // versão da leitura mudou). Com a aba oculta não busca nada: a agenda
+        // faz uma busca quando ela volta.
+        sensores: function (mensagem, ids) {
+            var nada = window.dash_clientside.no_update;
+            if (document.hidden || !mensagem) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            return (ids || []).map(function (id) {
+                var entrada = mensagem.sensores[id.sensor];
+                if (!entrada || entrada.leitura === leituras[id.sensor]) {
+                    return nada;
+                }
+                leituras[id.sensor] = entrada.leitura;
+                return mensagem.seq;
+            });
+        }
+    };
+
+    window.addEventListener("load", conectar);
+})();
@@ -0,0 +1,18 @@
+// Idade da última atualização do dashboard ("há N s"), contada no navegador.
+//
+// O servidor só manda o instante da atualização (store "cards-atualizado");
+// assim um tick de polling sem mudanças continua sem resposta (204) e a idade
+// exibida não para de andar.
+(function () {
+    window.dash_clientside = window.dash_clientside || {};
+    window.dash_clientside.idade = {
+        texto: function (n, atualizadoEm) {
+            if (!atualizadoEm) {
+                return "";
+            }
+            // Com o relógio do navegador adiantado em relação ao servidor, não mostra idade negativa
+            var idade = Math.max(0, Math.round((Date.now() - atualizadoEm) / 1000));
+            return "(há " + idade + " s)";
+        }
+    };
+})();
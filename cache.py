@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+# Cache simples em memória com tempo de expiração (TTL).
+#
+# Usado para não refazer, a cada navegação, trabalho que só muda quando o
+# banco recebe novas leituras (layouts das páginas de sensor, figuras etc.).
+import threading
+import time
+from functools import wraps
+
+
+def cache_ttl(segundos):
+    """
+    Decorator que guarda o resultado da função por `segundos`, separado pelos
+    argumentos da chamada. Exceções não são guardadas.
+    Entradas vencidas são descartadas a cada nova gravação (as chaves podem
+    incluir versões, ex.: da configuração, que não voltam a ser usadas).
+    A função decorada ganha o método `limpar()` para descartar o cache.
+    """
+    def decorator(funcao):
+        valores = {}
+        lock = threading.Lock()
+
+        @wraps(funcao)
+        def wrapper(*args, **kwargs):
+            chave = (args, tuple(sorted(kwargs.items())))
+            agora = time.monotonic()
+            with lock:
+                item = valores.get(chave)
+            if item is not None and item[0] > agora:
+                return item[1]
+
+            valor = funcao(*args, **kwargs)
+            with lock:
+                for vencida in [c for c, (expira, _) in valores.items() if expira <= agora]:
+                    del valores[vencida]
+                valores[chave] = (agora + segundos, valor)
+            return valor
+
+        def limpar():
+            with lock:
+                valores.clear()
+
+        wrapper.limpar = limpar
+        return wrapper
+    return decorator
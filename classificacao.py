@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# Classificação dos valores de COTA e %ALERTA em faixas (observação, atenção,
+# alerta, crítico) e nas cores correspondentes.
+#
+# As faixas do registro de sensores são compiladas uma vez em arrays NumPy de
+# limites (o início de cada faixa, em ordem crescente). Classificar uma coluna
+# inteira ou o snapshot de todos os sensores vira uma única operação vetorizada
+# (searchsorted / comparação com os limites), e todas as telas usam a mesma regra:
+# um valor pertence à maior faixa cujo início é <= valor.
+#
+# O classificador é recompilado quando o registro de sensores é recarregado
+# (nova versão do arquivo de configuração): use `classificador_atual()`.
+import threading
+
+import numpy as np
+
+from normalizacao import para_float
+from sensores import sensores_ativos, versao_config
+
+# Cor de cada faixa
+CORES_FAIXAS = {
+    "observacao": "#1E90FF",  # azul
+    "atencao": "#FFD700",     # amarelo
+    "alerta": "#FFA500",      # laranja
+    "critico": "#FF4500",     # vermelho
+}
+COR_NEUTRA = "#FFFFFF"  # sem valor ou sem faixas definidas
+
+TIPOS = {"COTA": "cota", "ALERTA": "alerta"}
+
+
+class Classificador:
+    """
+    Faixas de todos os sensores compiladas em arrays de limites, por tipo.
+    """
+
+    def __init__(self, sensores):
+        self.indice = {s["nome"]: i for i, s in enumerate(sensores)}
+        self._limites = {}   # tipo -> {nome: array de limites}
+        self._nomes = {}     # tipo -> {nome: [nome de cada faixa]}
+        self._matriz = {}    # tipo -> (limites 2D, cores 2D) para o snapshot
+        for tipo, chave in TIPOS.items():
+            limites, nomes = {}, {}
+            for s in sensores:
+                faixas = s.get(chave)
+                if not faixas:
+                    continue
+                ordem = sorted(faixas.items(), key=lambda item: item[1][0])
+                nomes[s["nome"]] = [nome_faixa for nome_faixa, _ in ordem]
+                # O início da primeira faixa não separa nada: valores abaixo
+                # dele continuam na primeira faixa. Os limites passam por
+                # float32, a mesma precisão das leituras normalizadas, para que
+                # um valor igual ao limite (ex.: 5.41) caia na faixa certa.
+                limites[s["nome"]] = np.array([faixa[0] for _, faixa in ordem[1:]], dtype="float32").astype("float64")
+            self._limites[tipo] = limites
+            self._nomes[tipo] = nomes
+            self._matriz[tipo] = self._compilar_matriz(sensores, limites, nomes)
+
+    def _compilar_matriz(self, sensores, limites, nomes):
+        # Uma linha por sensor; sensores sem faixas ficam com limites +inf e cor neutra
+        n_limites = max((len(v) for v in limites.values()), default=0)
+        matriz_limites = np.full((len(sensores) + 1, n_limites), np.inf)
+        matriz_cores = np.full((len(sensores) + 1, n_limites + 1), COR_NEUTRA, dtype=object)
+        for nome, lim in limites.items():
+            i = self.indice[nome]
+            matriz_limites[i, :len(lim)] = lim
+            matriz_cores[i, :len(lim) + 1] = [CORES_FAIXAS.get(f, COR_NEUTRA) for f in nomes[nome]]
+        return matriz_limites, matriz_cores
+
+    def niveis(self, valores, nome, tipo="COTA"):
+        """
+        Índice da faixa de cada valor (0 = primeira faixa); -1 para valores
+        inválidos ou sensor sem faixas.
+        """
+        v = para_float(valores)
+        limites = self._limites[tipo].get(str(nome))
+        if limites is None:
+            return np.full(v.shape, -1)
+        nivel = np.searchsorted(limites, v, side="right")
+        return np.where(np.isnan(v), -1, nivel)
+
+    def faixas(self, valores, nome, tipo="COTA"):
+        """Nome da faixa de cada valor (None quando não classificável)."""
+        nomes = self._nomes[tipo].get(str(nome), [])
+        return [nomes[n] if n >= 0 else None for n in self.niveis(valores, nome, tipo)]
+
+    def cores(self, valores, nome, tipo="COTA"):
+        """Cor de cada valor de uma coluna do sensor (array de strings)."""
+        nomes = self._nomes[tipo].get(str(nome), [])
+        paleta = np.array([CORES_FAIXAS.get(f, COR_NEUTRA) for f in nomes] + [COR_NEUTRA], dtype=object)
+        # nível -1 aponta para o último item da paleta (cor neutra)
+        return paleta[self.niveis(valores, nome, tipo)]
+
+    def cor(self, valor, nome, tipo="COTA"):
+        """Cor de um único valor."""
+        return self.cores([valor], nome, tipo)[0]
+
+    def cores_snapshot(self, nomes, valores, tipo="COTA"):
+        """
+        Cor de um valor por sensor (ex.: última leitura de cada sensor), em uma
+        única operação vetorizada sobre todos os sensores.
+        """
+        matriz_limites, matriz_cores = self._matriz[tipo]
+        linhas = np.array([self.indice.get(str(n), -1) for n in nomes], dtype=int)
+        v = para_float(valores)
+        nivel = (v[:, None] >= matriz_limites[linhas]).sum(axis=1)
+        cores = matriz_cores[linhas, nivel]
+        # Sem valor ou sensor fora do registro (linha -1 = linha extra, neutra)
+        cores[np.isnan(v)] = COR_NEUTRA
+        return cores
+
+
+# Instância compilada a partir do registro de sensores (uma por versão do registro)
+_lock = threading.Lock()
+_compilado = (None, None)  # (versão do registro, Classificador)
+
+
+def classificador_atual():
+    """Classificador compilado para a versão atual do registro de sensores."""
+    global _compilado
+    versao = versao_config()
+    if _compilado[0] != versao:
+        with _lock:
+            if _compilado[0] != versao:
+                _compilado = (versao, Classificador(sensores_ativos()))
+    return _compilado[1]
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# Coalescência de chamadas idênticas simultâneas ("single-flight").
+#
+# Quando várias threads pedem a mesma coisa ao mesmo tempo (ex.: todas as abas
+# atualizando juntas depois de uma queda de rede ou de um deploy), só a primeira
+# executa; as demais esperam essa execução terminar e recebem o mesmo resultado
+# (ou a mesma exceção). Nada fica guardado depois: é só para chamadas em voo.
+import threading
+
+
+class _EmVoo:
+    def __init__(self):
+        self.pronto = threading.Event()
+        self.resultado = None
+        self.erro = None
+        self.esperando = 0
+
+
+class Coalescedor:
+    """
+    Executa `funcao()` uma única vez por `chave` entre chamadas concorrentes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._em_voo = {}
+        self._stats = {"executadas": 0, "coalescidas": 0}
+
+    def executar(self, chave, funcao):
+        """
+        Retorna (resultado, compartilhado): `compartilhado` é True quando o
+        resultado veio da execução de outra chamada.
+        """
+        with self._lock:
+            voo = self._em_voo.get(chave)
+            lider = voo is None
+            if lider:
+                voo = self._em_voo[chave] = _EmVoo()
+                self._stats["executadas"] += 1
+            else:
+                voo.esperando += 1
+                self._stats["coalescidas"] += 1
+
+        if not lider:
+            voo.pronto.wait()
+            if voo.erro is not None:
+                raise voo.erro
+            return voo.resultado, True
+
+        try:
+            voo.resultado = funcao()
+            return voo.resultado, False
+        except Exception as e:
+            voo.erro = e
+            raise
+        finally:
+            with self._lock:
+                del self._em_voo[chave]
+            voo.pronto.set()
+
+    def estatisticas(self):
+        """Chamadas executadas, coalescidas e em voo (desde o início do processo)."""
+        with self._lock:
+            executadas = self._stats["executadas"]
+            coalescidas = self._stats["coalescidas"]
+            em_voo = len(self._em_voo)
+        total = executadas + coalescidas
+        return {
+            "executadas": executadas,
+            "coalescidas": coalescidas,
+            "em_voo": em_voo,
+            "taxa_coalescencia": round(coalescidas / total, 4) if total else 0.0,
+        }
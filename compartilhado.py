@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+# Estado compartilhado entre os workers do gunicorn (arquivos mapeados em memória).
+#
+# Com vários workers, cada um mantinha o seu snapshot e os seus buffers e
+# consultava o banco por conta própria. Agora um único worker (o "líder",
+# eleito por um lock de arquivo) consulta o banco e publica o resultado num
+# arquivo mapeado em memória (mmap, em /dev/shm quando disponível); os demais
+# só leem. Se o líder morrer, o lock é liberado pelo sistema e o próximo worker
+# que tentar assume.
+#
+# Formato de cada segmento: um cabeçalho com um contador de versão e duas áreas
+# de dados (double buffer). O líder grava sempre na área inativa e só depois
+# troca a área ativa no cabeçalho. O contador funciona como um seqlock: fica
+# ímpar durante a troca, e o leitor repete a leitura se a versão mudou no meio.
+# Assim os leitores nunca bloqueiam nem veem dados pela metade.
+#
+# Cada área tem um cabeçalho pequeno em pickle (o valor publicado e onde está
+# cada array) seguido dos arrays NumPy gravados crus. Os leitores acessam os
+# arrays como views do mmap (np.frombuffer), sem desserializar nem copiar a
+# publicação inteira para o heap de cada worker: copiam só o recorte que
+# precisam e conferem com `valido()` que a versão não mudou durante a cópia.
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import time
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem eleição, cada processo é líder de si mesmo
+    fcntl = None
+
+_PADRAO_DIR = "/dev/shm/noah" if os.path.isdir("/dev/shm") else os.path.join(tempfile.gettempdir(), "noah")
+COMPARTILHADO_DIR = os.environ.get("COMPARTILHADO_DIR", _PADRAO_DIR)
+# Tamanho de cada área de dados de um segmento (MB)
+COMPARTILHADO_MB = int(os.environ.get("COMPARTILHADO_MB", "16"))
+# Intervalo (s) entre tentativas de um seguidor de assumir a liderança
+LIDERANCA_RECHECAGEM = float(os.environ.get("LIDERANCA_RECHECAGEM", "5"))
+
+_MAGICO = b"NOAHSHM1"
+# mágico, versão (seqlock), área ativa, tamanho dos dados na área ativa
+_CABECALHO = struct.Struct("<8sQQQ")
+_TAM_CABECALHO = 64
+# Tamanho do pickle no início de cada área
+_TAM_META = struct.Struct("<Q")
+# Espera (s) de um leitor enquanto a área ativa está sendo trocada
+_ESPERA_TROCA = 0.0005
+
+
+def _alinhar(posicao, alinhamento=8):
+    return -(-posicao // alinhamento) * alinhamento
+
+
+class Lideranca:
+    """
+    Eleição do processo que consulta o banco: quem conseguir o lock exclusivo
+    do arquivo é o líder enquanto o processo viver. Um seguidor só tenta o
+    lock de novo a cada `rechecagem` segundos; entre as tentativas, e_lider()
+    responde sem tocar no arquivo.
+    """
+
+    def __init__(self, caminho, rechecagem=5):
+        self.caminho = caminho
+        self.rechecagem = rechecagem
+        self._arquivo = None
+        self._proxima_tentativa = 0
+
+    def e_lider(self):
+        """True se este processo é (ou acabou de se tornar) o líder."""
+        if fcntl is None or self._arquivo is not None:
+            return True
+        agora = time.monotonic()
+        if agora < self._proxima_tentativa:
+            return False
+        self._proxima_tentativa = agora + self.rechecagem
+        os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+        arquivo = open(self.caminho, "a")
+        try:
+            fcntl.flock(arquivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            arquivo.close()
+            return False
+        self._arquivo = arquivo
+        print(f"[compartilhado] Processo {os.getpid()} é o líder")
+        return True
+
+
+class Sinal:
+    """
+    Aviso entre processos de que algo está em uso: quem usa chama `renovar()`
+    (atualiza o mtime de um arquivo) e os outros consultam `ativo(validade)`.
+    """
+
+    def __init__(self, nome, diretorio=None):
+        self.caminho = os.path.join(diretorio or COMPARTILHADO_DIR, f"{nome}.sinal")
+
+    def renovar(self):
+        try:
+            os.utime(self.caminho)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+            open(self.caminho, "a").close()
+
+    def ativo(self, validade):
+        """True se alguém renovou o sinal nos últimos `validade` segundos."""
+        try:
+            return time.time() - os.stat(self.caminho).st_mtime <= validade
+        except FileNotFoundError:
+            return False
+
+
+class SegmentoCompartilhado:
+    """
+    Valor Python (pequeno, em pickle) e arrays NumPy publicados por um processo
+    e lidos por todos, num arquivo mapeado em memória (double buffer e
+    seqlock). Os arrays ficam crus no mmap e são lidos como views.
+    """
+
+    def __init__(self, nome, tamanho_mb=None, diretorio=None):
+        self.caminho = os.path.join(diretorio or COMPARTILHADO_DIR, f"{nome}.mmap")
+        self.tamanho_area = int((tamanho_mb or COMPARTILHADO_MB) * 1024 * 1024)
+        self._mmap = None
+
+    def _mapa(self):
+        if self._mmap is None:
+            os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+            tamanho = _TAM_CABECALHO + 2 * self.tamanho_area
+            fd = os.open(self.caminho, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                if os.fstat(fd).st_size < tamanho:
+                    os.ftruncate(fd, tamanho)
+                self._mmap = mmap.mmap(fd, tamanho)
+            finally:
+                os.close(fd)
+        return self._mmap
+
+    def _cabecalho(self):
+        magico, versao, area, tamanho = _CABECALHO.unpack_from(self._mapa(), 0)
+        if magico != _MAGICO:
+            return 0, 0, 0
+        return versao, area, tamanho
+
+    def versao(self):
+        """Versão publicada (0 = nada publicado ainda). Leitura barata, só do cabeçalho."""
+        return self._cabecalho()[0] // 2
+
+    def valido(self, versao):
+        """True se `versao` ainda é a publicação ativa (o que foi copiado dela está íntegro)."""
+        return self.versao() == versao
+
+    def publicar(self, valor, arrays=None):
+        """
+        Grava `valor` e `arrays` ({chave: array 1-D}) na área inativa e a torna
+        ativa (apenas o líder chama).
+        """
+        arrays = {chave: np.ascontiguousarray(a) for chave, a in (arrays or {}).items()}
+        posicoes, posicao = {}, 0
+        for chave, a in arrays.items():
+            posicoes[chave] = (posicao, a.dtype.str, len(a))
+            posicao = _alinhar(posicao + a.nbytes)
+        meta = pickle.dumps((valor, posicoes), protocol=pickle.HIGHEST_PROTOCOL)
+        inicio_arrays = _alinhar(_TAM_META.size + len(meta))
+        tamanho = inicio_arrays + posicao
+        if tamanho > self.tamanho_area:
+            raise ValueError(f"{self.caminho}: {tamanho} bytes não cabem na área ({self.tamanho_area})")
+
+        mapa = self._mapa()
+        versao, area, _ = self._cabecalho()
+        versao += versao % 2  # um líder anterior pode ter morrido no meio da troca
+        nova_area = 1 - area
+        inicio = _TAM_CABECALHO + nova_area * self.tamanho_area
+        _TAM_META.pack_into(mapa, inicio, len(meta))
+        mapa[inicio + _TAM_META.size:inicio + _TAM_META.size + len(meta)] = meta
+        for chave, a in arrays.items():
+            destino = inicio + inicio_arrays + posicoes[chave][0]
+            mapa[destino:destino + a.nbytes] = a.tobytes()
+        # Seqlock: versão ímpar durante a troca da área ativa
+        _CABECALHO.pack_into(mapa, 0, _MAGICO, versao + 1, area, 0)
+        _CABECALHO.pack_into(mapa, 0, _MAGICO, versao + 1, nova_area, tamanho)
+        _CABECALHO.pack_into(mapa, 0, _MAGICO, versao + 2, nova_area, tamanho)
+
+    def ler(self):
+        """
+        Retorna (versão, valor, arrays) publicados; `arrays` são views somente
+        leitura do mmap (copie o que precisar e confira com `valido(versão)`).
+        Sem publicação ainda, retorna (0, None, {}).
+        """
+        mapa = self._mapa()
+        while True:
+            versao, area, _ = self._cabecalho()
+            if versao == 0:
+                return 0, None, {}
+            if versao % 2:
+                time.sleep(_ESPERA_TROCA)  # troca em andamento
+                continue
+            inicio = _TAM_CABECALHO + area * self.tamanho_area
+            (tamanho_meta,) = _TAM_META.unpack_from(mapa, inicio)
+            meta = mapa[inicio + _TAM_META.size:inicio + _TAM_META.size + tamanho_meta]
+            if self._cabecalho()[0] != versao:
+                continue
+            valor, posicoes = pickle.loads(meta)
+            inicio_arrays = inicio + _alinhar(_TAM_META.size + tamanho_meta)
+            arrays = {}
+            for chave, (posicao, tipo, n) in posicoes.items():
+                a = np.frombuffer(mapa, dtype=np.dtype(tipo), count=n, offset=inicio_arrays + posicao)
+                a.flags.writeable = False
+                arrays[chave] = a
+            return versao // 2, valor, arrays
+
+
+# Eleição compartilhada pelo snapshot e pelos buffers de leituras
+lideranca = Lideranca(os.path.join(COMPARTILHADO_DIR, "lider.lock"), rechecagem=LIDERANCA_RECHECAGEM)
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+# Acesso ao banco de dados dos sensores.
+#
+# Este módulo é o único dono do engine do SQLAlchemy. O app e as páginas de
+# sensor fazem todas as consultas através de `ler_sql`, então o total de
+# conexões com o SQL Server fica limitado a (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+# por worker do gunicorn, independentemente do número de páginas/usuários.
+#
+# Queries idênticas (mesmo texto e mesmos parâmetros) disparadas ao mesmo tempo
+# são coalescidas: só uma vai ao banco e as demais recebem uma cópia do resultado.
+#
+# Falhas de conexão seguidas abrem o disjuntor (disjuntor.py): a partir daí as
+# consultas falham na hora com BancoIndisponivel, sem esperar o timeout do ODBC,
+# até a sonda em background confirmar que o banco voltou.
+import os
+import threading
+import time
+import urllib
+
+import pandas as pd
+from sqlalchemy import create_engine, event, exc, text
+
+from coalescencia import Coalescedor
+from disjuntor import BancoIndisponivel, Disjuntor  # noqa: F401  (re-exportado)
+
+# === CONFIGURAÇÃO DA CONEXÃO COM O BANCO DE DADOS ===
+DB_HOST = os.environ.get("DB_HOST")
+DB_PORT = os.environ.get("DB_PORT", "1433")
+DB_NAME = os.environ.get("DB_NAME")
+DB_USER = os.environ.get("DB_USER")
+DB_PASS = os.environ.get("DB_PASS")
+
+# === CONFIGURAÇÃO DO POOL ===
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))          # conexões mantidas abertas
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "5"))    # conexões extras em picos
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", "10"))   # espera máx. por uma conexão livre (s)
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800")) # recicla conexões antigas (s)
+DB_LOGIN_TIMEOUT = int(os.environ.get("DB_LOGIN_TIMEOUT", "5"))  # timeout para abrir conexão (s)
+DB_QUERY_TIMEOUT = int(os.environ.get("DB_QUERY_TIMEOUT", "15")) # timeout de cada query (s)
+
+# === CONFIGURAÇÃO DO DISJUNTOR ===
+DISJUNTOR_FALHAS = int(os.environ.get("DISJUNTOR_FALHAS", "3"))  # falhas seguidas para abrir
+DISJUNTOR_ESPERA = int(os.environ.get("DISJUNTOR_ESPERA", "30")) # tempo aberto antes de sondar (s)
+
+params = urllib.parse.quote_plus(
+    f"DRIVER={{ODBC Driver 18 for SQL Server}};"
+    f"SERVER={DB_HOST},{DB_PORT};"
+    f"DATABASE={DB_NAME};"
+    f"UID={DB_USER};"
+    f"PWD={DB_PASS};"
+    f"Encrypt=no;"
+)
+
+engine = create_engine(
+    f"mssql+pyodbc:///?odbc_connect={params}",
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+    connect_args={"timeout": DB_LOGIN_TIMEOUT},
+)
+
+
+@event.listens_for(engine, "connect")
+def _configura_timeout(dbapi_connection, connection_record):
+    # No pyodbc, o atributo `timeout` da conexão é o timeout das queries
+    try:
+        dbapi_connection.timeout = DB_QUERY_TIMEOUT
+    except Exception:
+        pass
+
+
+# === ESTATÍSTICAS DE ESPERA POR CONEXÃO ===
+_lock_stats = threading.Lock()
+_stats = {"checkouts": 0, "espera_total": 0.0, "espera_max": 0.0}
+
+
+def _registra_espera(espera):
+    with _lock_stats:
+        _stats["checkouts"] += 1
+        _stats["espera_total"] += espera
+        _stats["espera_max"] = max(_stats["espera_max"], espera)
+
+
+_coalescedor = Coalescedor()
+
+# Erros que indicam banco/rede indisponível (erros de SQL não contam)
+_ERROS_CONEXAO = (exc.OperationalError, exc.InterfaceError, exc.TimeoutError, OSError)
+
+# Erros que as telas tratam mostrando os dados em memória: o disjuntor aberto e,
+# antes de ele abrir, as próprias falhas de conexão do driver
+ERROS_BANCO = (BancoIndisponivel, exc.DBAPIError, exc.TimeoutError, OSError)
+
+
+def _sonda():
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+disjuntor = Disjuntor(_sonda, limite_falhas=DISJUNTOR_FALHAS, espera=DISJUNTOR_ESPERA, nome="disjuntor-db")
+
+
+def _chave_query(query, params):
+    # Texto normalizado (espaços) + parâmetros ordenados
+    texto = " ".join(str(query).split())
+    return texto, tuple(sorted((str(k), repr(v)) for k, v in (params or {}).items()))
+
+
+def _executar(query, params):
+    inicio = time.perf_counter()
+    try:
+        with engine.connect() as conn:
+            _registra_espera(time.perf_counter() - inicio)
+            df = pd.read_sql(query, conn, params=params)
+    except _ERROS_CONEXAO as e:
+        disjuntor.falha(e)
+        raise
+    disjuntor.sucesso()
+    return df
+
+
+def ler_sql(query, params=None):
+    """
+    Executa a query usando o pool compartilhado e retorna um DataFrame.
+    Chamadas idênticas simultâneas compartilham uma única execução.
+    Com o disjuntor aberto, levanta BancoIndisponivel imediatamente.
+    """
+    disjuntor.verificar()
+    df, compartilhado = _coalescedor.executar(_chave_query(query, params), lambda: _executar(query, params))
+    # Quem recebe o resultado de outra chamada ganha a sua própria cópia
+    return df.copy() if compartilhado else df
+
+
+def _metrica_pool(pool, nome):
+    # Nem todo tipo de pool (ex.: o do sqlite) implementa todas as métricas
+    metrica = getattr(pool, nome, None)
+    return metrica() if callable(metrica) else None
+
+
+def estatisticas_pool():
+    """Retorna um dicionário com o estado do pool e o tempo de espera por conexões."""
+    pool = engine.pool
+    with _lock_stats:
+        checkouts = _stats["checkouts"]
+        espera_total = _stats["espera_total"]
+        espera_max = _stats["espera_max"]
+    return {
+        "tamanho": _metrica_pool(pool, "size"),
+        "em_uso": _metrica_pool(pool, "checkedout"),
+        "livres": _metrica_pool(pool, "checkedin"),
+        "overflow": _metrica_pool(pool, "overflow"),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "checkouts": checkouts,
+        "espera_media_ms": round(espera_total / checkouts * 1000, 2) if checkouts else 0.0,
+        "espera_max_ms": round(espera_max * 1000, 2),
+        "coalescencia": _coalescedor.estatisticas(),
+        "disjuntor": disjuntor.estatisticas(),
+    }
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# Disjuntor (circuit breaker) para o acesso ao banco.
+#
+# Quando o banco ou o túnel do Tailscale caem, cada consulta esperaria o timeout
+# do ODBC segurando uma thread do worker. Depois de DISJUNTOR_FALHAS falhas
+# seguidas o disjuntor abre: as consultas falham na hora (BancoIndisponivel) e
+# as telas continuam exibindo os últimos dados válidos. Uma thread em background
+# testa o banco (sonda) a cada poucos segundos depois de DISJUNTOR_ESPERA
+# segundos; quando a sonda passa, o disjuntor fecha e as consultas voltam.
+import threading
+import time
+
+from normalizacao import agora
+from tarefas import TarefaPeriodica
+
+FECHADO = "fechado"
+ABERTO = "aberto"
+
+
+class BancoIndisponivel(RuntimeError):
+    """Consulta recusada porque o disjuntor do banco está aberto."""
+
+
+class Disjuntor:
+    """
+    Abre depois de `limite_falhas` falhas seguidas; fecha quando `sonda()`
+    executa sem erro (testada em background, após `espera` segundos).
+    """
+
+    def __init__(self, sonda, limite_falhas=3, espera=30, nome="disjuntor"):
+        self.sonda = sonda
+        self.limite_falhas = limite_falhas
+        self.espera = espera
+        self.nome = nome
+        self._lock = threading.Lock()
+        self._estado = FECHADO
+        self._falhas = 0
+        self._aberto_em = None      # time.monotonic() da abertura
+        self._aberto_desde = None   # datetime da abertura (para exibir)
+        self._ultimo_erro = None
+        self._rejeitadas = 0
+        self._aberturas = 0
+        self._tarefa = TarefaPeriodica(self._sondar, max(1, espera / 5), nome=f"{nome}-sonda")
+
+    @property
+    def aberto(self):
+        return self._estado == ABERTO
+
+    def verificar(self):
+        """Levanta BancoIndisponivel se o disjuntor estiver aberto."""
+        if self._estado == ABERTO:
+            with self._lock:
+                self._rejeitadas += 1
+            raise BancoIndisponivel(f"Banco indisponível desde {self._aberto_desde:%H:%M:%S}: {self._ultimo_erro}")
+
+    def sucesso(self):
+        with self._lock:
+            self._falhas = 0
+
+    def falha(self, erro):
+        with self._lock:
+            self._falhas += 1
+            self._ultimo_erro = str(erro).splitlines()[0][:200] if str(erro) else type(erro).__name__
+            if self._estado == FECHADO and self._falhas >= self.limite_falhas:
+                self._estado = ABERTO
+                self._aberto_em = time.monotonic()
+                self._aberto_desde = agora()
+                self._aberturas += 1
+                print(f"[{self.nome}] Aberto após {self._falhas} falhas: {self._ultimo_erro}")
+        if self._estado == ABERTO:
+            # A thread da sonda é iniciada uma vez e fica ociosa enquanto fechado
+            self._tarefa.iniciar()
+
+    def _sondar(self):
+        if self._estado != ABERTO or time.monotonic() - self._aberto_em < self.espera:
+            return
+        try:
+            self.sonda()
+        except Exception as e:
+            with self._lock:
+                self._ultimo_erro = str(e).splitlines()[0][:200] if str(e) else type(e).__name__
+            return
+        with self._lock:
+            self._estado = FECHADO
+            self._falhas = 0
+        print(f"[{self.nome}] Fechado: banco respondeu à sonda")
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "estado": self._estado,
+                "falhas_seguidas": self._falhas,
+                "aberto_desde": self._aberto_desde if self._estado == ABERTO else None,
+                "ultimo_erro": self._ultimo_erro,
+                "rejeitadas": self._rejeitadas,
+                "aberturas": self._aberturas,
+            }
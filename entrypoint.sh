@@ -14,4 +14,5 @@ tailscale up --authkey=${TAILSCALE_AUTHKEY} --hostname=render-dash --accept-rout
 
 # Inicia a aplicação Dash
 echo "Iniciando aplicação Dash..."
-exec gunicorn app:server -b 0.0.0.0:$PORT --workers=2
+# Worker com threads: cada conexão do canal de eventos (/eventos) ocupa uma thread
+exec gunicorn app:server -b 0.0.0.0:$PORT --workers=2 --worker-class=gthread --threads=${GUNICORN_THREADS:-50}
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+# Atualizações empurradas pelo servidor (Server-Sent Events).
+#
+# Antes, o dashboard e cada página de sensor faziam polling a cada 20 s, com um
+# callback completo do Dash por aba mesmo quando nada tinha mudado. Agora:
+#
+# - MonitorNovidades (só no líder) roda uma consulta mínima (o maior `data` da
+#   tabela) a cada EVENTOS_NOVIDADES segundos; quando ela muda, atualiza na hora
+#   os buffers, o snapshot e o canal, em vez de esperar o próximo ciclo de 20 s.
+#   Ele só consulta enquanto algum worker tem clientes conectados (sinal
+#   compartilhado "eventos"); sem ninguém no canal, ficam só os ciclos normais.
+# - CanalEventos (um por worker) compara o estado exibido nas telas com o
+#   anterior e, só quando algo mudou, envia aos navegadores conectados em
+#   /eventos um delta com os sensores que mudaram (cards ou leitura mais
+#   recente). Nos seguidores, ele confere a cada EVENTOS_VIGIA segundos as
+#   versões dos segmentos compartilhados (só o cabeçalho) e compara o estado
+#   assim que o líder republica. Sem mudanças, a conexão fica parada (só um
+#   comentário de keep-alive a cada EVENTOS_HEARTBEAT segundos).
+#
+# O navegador (assets/eventos.js) desliga os dcc.Interval enquanto o canal está
+# conectado e os religa se a conexão cair ou for recusada: o polling continua
+# sendo o fallback.
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from compartilhado import Sinal, lideranca
+from db import BancoIndisponivel, ler_sql
+from normalizacao import agora
+from tarefas import TarefaPeriodica
+
+# Intervalo (s) da consulta de novidades no banco (só no líder, com clientes)
+EVENTOS_NOVIDADES = float(os.environ.get("EVENTOS_NOVIDADES", "1"))
+# Intervalo (s) da conferência das versões publicadas pelo líder
+EVENTOS_VIGIA = float(os.environ.get("EVENTOS_VIGIA", "0.25"))
+# Intervalo (s) da verificação completa do estado (ex.: aviso de desatualizado)
+EVENTOS_INTERVALO = float(os.environ.get("EVENTOS_INTERVALO", "3"))
+# Intervalo (s) do keep-alive das conexões paradas
+EVENTOS_HEARTBEAT = int(os.environ.get("EVENTOS_HEARTBEAT", "15"))
+# Duração máxima (s) de cada conexão; o navegador reconecta sozinho
+EVENTOS_DURACAO = int(os.environ.get("EVENTOS_DURACAO", "300"))
+# Conexões simultâneas por worker (cada uma ocupa uma thread do gunicorn)
+EVENTOS_MAX_CLIENTES = int(os.environ.get("EVENTOS_MAX_CLIENTES", "40"))
+# Espera (ms) sugerida ao navegador antes de reconectar
+EVENTOS_RECONEXAO_MS = int(os.environ.get("EVENTOS_RECONEXAO_MS", "3000"))
+
+# Deltas guardados para quem ficou para trás (além disso, envia o estado completo)
+_TAMANHO_HISTORICO = 64
+
+# Renovado pelos workers que têm clientes no canal
+assinantes = Sinal("eventos")
+# Tempo (s) que a renovação vale: cobre algumas verificações completas do canal
+_VALIDADE_ASSINANTES = 3 * EVENTOS_INTERVALO
+
+
+class MonitorNovidades:
+    """
+    Executa `query` (que retorna um único valor, ex.: o maior `data`) a cada
+    `intervalo` segundos no processo líder e chama as funções de `ao_mudar`
+    quando o valor muda. Só consulta enquanto algum worker tem clientes no
+    canal de eventos.
+    """
+
+    def __init__(self, query, ao_mudar, intervalo=1):
+        self.query = query
+        self.ao_mudar = list(ao_mudar)
+        self.intervalo = intervalo
+        self._marca = None
+        self._tarefa = TarefaPeriodica(self.verificar, intervalo, nome="monitor-novidades")
+
+    def iniciar(self):
+        self._tarefa.iniciar()
+
+    def parar(self):
+        self._tarefa.parar()
+
+    def verificar(self):
+        if not lideranca.e_lider():
+            return
+        if not assinantes.ativo(_VALIDADE_ASSINANTES):
+            return  # ninguém no canal; na volta, a marca antiga dispara a atualização
+        try:
+            df = ler_sql(self.query)
+        except BancoIndisponivel:
+            return  # o disjuntor avisa quando o banco volta
+        marca = None if df.empty else str(df.iloc[0, 0])
+        if marca == self._marca:
+            return
+        # A primeira consulta também atualiza: o monitor fica parado sem
+        # clientes, então a marca anterior pode ser de muito antes
+        self._marca = marca
+        for funcao in self.ao_mudar:
+            funcao()
+
+
+class CanalEventos:
+    """
+    Difunde para os clientes conectados as mudanças do estado retornado por
+    `estado()`: um dict com "sensores" ({nome: valores}, comparado sensor a
+    sensor) e outras chaves (comparadas inteiras).
+    `marca()`, se informada, é conferida a cada `vigia` segundos e deve ser
+    barata (ex.: versões dos segmentos compartilhados); quando ela muda, o
+    estado é comparado na hora. Sem mudança, a comparação é a cada `intervalo` s.
+    `carimbo()` informa o instante dos dados enviados (padrão: o da mudança).
+    """
+
+    def __init__(self, estado, intervalo=3, max_clientes=40, marca=None, carimbo=None, vigia=0.25):
+        self.estado = estado
+        self.marca = marca
+        self.carimbo = carimbo
+        self.intervalo = intervalo
+        self.max_clientes = max_clientes
+        self._cond = threading.Condition()
+        self._lock_verificar = threading.Lock()
+        self._seq = 0
+        self._atual = None
+        self._hora = None
+        self._atualizado_em = None  # ms desde a época, para a idade exibida no navegador
+        self._historico = deque(maxlen=_TAMANHO_HISTORICO)
+        self._clientes = 0
+        self._stats = {"mensagens": 0, "conexoes": 0, "recusadas": 0}
+        self._marca = None
+        self._proxima = 0.0
+        self._tarefa = TarefaPeriodica(self._vigiar, vigia, nome="canal-eventos")
+
+    def iniciar(self):
+        self._tarefa.iniciar()
+
+    def parar(self):
+        self._tarefa.parar()
+
+    def _vigiar(self):
+        marca = self.marca() if self.marca is not None else None
+        if marca == self._marca and time.monotonic() < self._proxima:
+            return
+        self._marca = marca
+        self._proxima = time.monotonic() + self.intervalo
+        self.verificar()
+
+    def verificar(self):
+        """Compara o estado atual com o anterior e publica o delta, se houver."""
+        with self._lock_verificar:
+            if self._clientes:
+                assinantes.renovar()
+            self._verificar()
+
+    def _verificar(self):
+        novo = self.estado()
+        anterior = self._atual or {"sensores": {}}
+        sensores = {nome: valor for nome, valor in novo["sensores"].items()
+                    if anterior["sensores"].get(nome) != valor}
+        outros = {chave: valor for chave, valor in novo.items() if chave != "sensores"}
+        if self._atual is not None and not sensores and all(anterior.get(c) == v for c, v in outros.items()):
+            return
+        with self._cond:
+            self._seq += 1
+            self._atual = novo
+            # Hora dos dados (ex.: do snapshot), não a da comparação: sem banco,
+            # o cabeçalho continua mostrando quando os dados foram lidos
+            instante = (self.carimbo() if self.carimbo is not None else None) or agora()
+            self._hora = instante.strftime("%d/%m/%Y %H:%M:%S")
+            self._atualizado_em = int(instante.timestamp() * 1000)
+            self._historico.append((self._seq, {**outros, "sensores": sensores, "hora": self._hora,
+                                                "atualizado_em": self._atualizado_em}))
+            self._stats["mensagens"] += 1
+            self._cond.notify_all()
+
+    def _pendente(self, seq):
+        # Deltas desde `seq` mesclados; estado completo na primeira mensagem
+        # ou se o cliente ficou mais para trás que o histórico
+        if self._atual is None or seq == self._seq:
+            return None
+        if seq is None or self._historico[0][0] > seq + 1:
+            return {**self._atual, "hora": self._hora, "atualizado_em": self._atualizado_em, "completo": True}
+        mensagem = {"sensores": {}}
+        for s, delta in self._historico:
+            if s > seq:
+                mensagem.update({**delta, "sensores": {**mensagem["sensores"], **delta["sensores"]}})
+        return mensagem
+
+    def conectar(self, duracao=EVENTOS_DURACAO, heartbeat=EVENTOS_HEARTBEAT):
+        """
+        Reserva uma vaga e retorna o gerador do stream SSE, ou None se o worker
+        já tem `max_clientes` conexões (o navegador fica no polling). A vaga é
+        liberada com `desconectar()`, quando a resposta é fechada.
+        """
+        with self._cond:
+            if self._clientes >= self.max_clientes:
+                self._stats["recusadas"] += 1
+                return None
+            self._clientes += 1
+            self._stats["conexoes"] += 1
+        assinantes.renovar()
+        return self._stream(duracao, heartbeat)
+
+    def desconectar(self):
+        with self._cond:
+            self._clientes = max(0, self._clientes - 1)
+
+    def _stream(self, duracao, heartbeat):
+        fim = time.monotonic() + duracao
+        yield f"retry: {EVENTOS_RECONEXAO_MS}\n\n"
+        seq = None
+        while True:
+            restante = fim - time.monotonic()
+            if restante <= 0:
+                return
+            with self._cond:
+                if self._atual is None or seq == self._seq:
+                    self._cond.wait(min(heartbeat, restante))
+                mensagem = self._pendente(seq)
+                if mensagem is not None:
+                    seq = self._seq
+            if mensagem is None:
+                yield ": ping\n\n"
+            else:
+                yield f"id: {seq}\ndata: {json.dumps({**mensagem, 'seq': seq}, ensure_ascii=False)}\n\n"
+
+    def estatisticas(self):
+        """Clientes conectados, mensagens publicadas e conexões recusadas (por worker)."""
+        with self._cond:
+            return {"clientes": self._clientes, "seq": self._seq, **self._stats}
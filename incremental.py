@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+# Busca incremental das leituras dos sensores (por marca d'água).
+#
+# Em vez de reler a cada atualização o histórico de 24h, o TOP 48, o TOP 10 e a
+# última linha de cada sensor, guardamos em memória um buffer por sensor com as
+# leituras da janela recente e lembramos o último instante visto de cada sensor
+# (a "marca d'água"). Cada atualização busca só as linhas mais novas que a marca,
+# voltando alguns minutos (lookback) para pegar leituras que chegam atrasadas, e
+# acrescenta no buffer só as que são mais novas que a última já guardada. O custo
+# de cada atualização passa a ser proporcional ao número de leituras novas, e
+# não ao tamanho da janela.
+#
+# Os buffers são circulares, com arrays NumPy pré-alocados (anel.py): acrescentar
+# não recria DataFrames, leituras atrasadas entram na posição certa e as telas
+# leem cópias dos recortes (uma gravação nunca altera o que já foi lido).
+#
+# Com vários workers, só o líder (compartilhado.py) consulta o banco e publica as
+# séries da janela num segmento compartilhado (arrays crus no mmap); os demais
+# workers não têm buffers próprios: leem as séries publicadas como views do
+# mmap e copiam só as do sensor pedido, sem consultar o banco. Um seguidor que
+# vira líder começa com uma cópia do que estava publicado.
+#
+# Na carga inicial, os buffers são preenchidos a partir do armazém local
+# (armazem.py) quando ele tem as leituras da janela; o banco só é consultado
+# para o que ainda não foi sincronizado em disco.
+import os
+import threading
+import time
+from datetime import timedelta
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from anel import BufferCircular
+from armazem import armazem_local
+from compartilhado import SegmentoCompartilhado, lideranca
+from db import ERROS_BANCO, ler_sql
+from normalizacao import COLUNAS_NUMERICAS, TZ_SENSORES, agora, normalizar, para_banco
+from sensores import sensores_ativos
+from tarefas import TarefaPeriodica
+
+BUFFER_JANELA_HORAS = int(os.environ.get("BUFFER_JANELA_HORAS", "24"))
+BUFFER_LOOKBACK_MIN = int(os.environ.get("BUFFER_LOOKBACK_MIN", "10"))
+BUFFER_INTERVALO = int(os.environ.get("BUFFER_INTERVALO", "20"))
+# Leituras por sensor no buffer (padrão: 2 por minuto da janela)
+BUFFER_CAPACIDADE = int(os.environ.get("BUFFER_CAPACIDADE", "0")) or None
+
+
+class BuscaIncremental:
+    """
+    Mantém um buffer circular (anel.py) por sensor com as leituras da janela
+    recente, atualizado incrementalmente a partir da marca d'água.
+    `nomes` é uma função que retorna os sensores a acompanhar; ela é consultada
+    a cada atualização, então sensores incluídos/removidos na configuração
+    passam a valer sem reiniciar o processo.
+    `semente(nome, desde)`, se informada, fornece as leituras já disponíveis
+    localmente para a carga inicial de cada sensor.
+    `compartilhado` é o nome do segmento usado para dividir os buffers entre
+    os workers (None = cada processo busca os seus).
+    """
+
+    def __init__(self, nomes, janela_horas=24, lookback_minutos=10, intervalo=20, semente=None, capacidade=None,
+                 compartilhado=None):
+        self._fonte_nomes = nomes
+        self._semente = semente
+        self._segmento = SegmentoCompartilhado(compartilhado) if compartilhado else None
+        self._versao_segmento = None
+        self._publicado = None  # (versão, valor, views) do segmento, nos seguidores
+        self.nomes = list(nomes())
+        self.janela = timedelta(hours=janela_horas)
+        self.lookback = timedelta(minutes=lookback_minutos)
+        # Padrão: uma leitura por minuto na janela, com folga de 2x
+        self.capacidade = capacidade or int(janela_horas * 60 * 2)
+        self._aneis = MappingProxyType({})
+        self._limite = None  # instante (ns, UTC) mais antigo dentro da janela
+        self._lock = threading.Lock()
+        self._carregado = False
+        self._proxima_carga = 0.0
+        self.linhas_ultima_busca = 0
+        self._tarefa = TarefaPeriodica(self.atualizar, intervalo, nome="busca-incremental")
+
+    def iniciar(self):
+        """Inicia a thread de atualização (apenas uma vez por processo)."""
+        self._tarefa.iniciar()
+
+    def parar(self):
+        self._tarefa.parar()
+
+    def _marca(self, nome):
+        anel = self._aneis.get(nome)
+        ultimo = anel.ultimo if anel is not None else None
+        return pd.Timestamp(ultimo, tz="UTC") if ultimo is not None else None
+
+    def _montar_query(self):
+        # Uma única query com um filtro por sensor: a partir da marca d'água
+        # (menos o lookback) ou, se o sensor ainda não tem marca, a janela toda.
+        clausulas = []
+        params = {"janela_horas": int(self.janela.total_seconds() // 3600)}
+        for i, nome in enumerate(self.nomes):
+            params[f"nome_{i}"] = nome
+            marca = self._marca(nome)
+            if marca is None:
+                clausulas.append(
+                    f"(nome = :nome_{i} AND data >= DATEADD(hour, -:janela_horas, GETDATE()))"
+                )
+            else:
+                params[f"desde_{i}"] = para_banco(marca - self.lookback)
+                clausulas.append(f"(nome = :nome_{i} AND data >= :desde_{i})")
+        query = text("SELECT * FROM dados_sensores WHERE " + " OR ".join(clausulas))
+        return query, params
+
+    def _acrescentar(self, aneis, nome, df):
+        anel = aneis.get(nome)
+        if anel is None:
+            anel = aneis[nome] = BufferCircular(self.capacidade, COLUNAS_NUMERICAS)
+        instantes = df["instante"].to_numpy(dtype="datetime64[ns]").view("int64")
+        return anel.acrescentar(instantes, {c: df[c].to_numpy() for c in COLUNAS_NUMERICAS if c in df.columns})
+
+    def _seguidor(self):
+        return self._segmento is not None and not lideranca.e_lider()
+
+    def _ler_compartilhado(self):
+        # Mapeia as séries publicadas pelo líder (views do mmap, sem copiar);
+        # o cabeçalho só é relido quando a versão do segmento muda
+        versao = self._segmento.versao()
+        if versao == 0:
+            return False
+        if self._publicado is None or self._publicado[0] != versao:
+            self._publicado = self._segmento.ler()
+            self._carregado = True
+        return True
+
+    def _copiar_publicado(self, nome):
+        # Copia do mmap só as séries do sensor; se o líder publicou no meio
+        # da cópia, mapeia a nova versão e copia de novo
+        while True:
+            versao, publicado, arrays = self._publicado
+            if nome not in publicado["versoes"]:
+                return np.empty(0, dtype="int64"), {}
+            instantes = arrays[f"{nome}/instante"].copy()
+            valores = {c: arrays[f"{nome}/{c}"].copy() for c in COLUNAS_NUMERICAS}
+            if self._segmento.valido(versao):
+                return instantes, valores
+            self._ler_compartilhado()
+
+    def _versoes_publicadas(self, nome):
+        return self._publicado[1]["versoes"].get(nome, (None, None))
+
+    def _restaurar_publicado(self, aneis):
+        # Um seguidor que virou líder continua dos buffers publicados
+        versao, publicado, arrays = self._segmento.ler()
+        if publicado is None:
+            return
+        for nome, (versao_anel, versao_atrasadas) in publicado["versoes"].items():
+            if nome in self.nomes:
+                aneis[nome] = BufferCircular.restaurar(
+                    self.capacidade, COLUNAS_NUMERICAS, arrays[f"{nome}/instante"],
+                    {c: arrays[f"{nome}/{c}"] for c in COLUNAS_NUMERICAS}, versao_anel, versao_atrasadas)
+        self._publicado = None
+
+    def _publicar(self):
+        versoes, arrays = {}, {}
+        for nome, anel in self._aneis.items():
+            instantes, valores = self.serie(nome)
+            arrays[f"{nome}/instante"] = instantes
+            for coluna in COLUNAS_NUMERICAS:
+                arrays[f"{nome}/{coluna}"] = valores[coluna]
+            versoes[nome] = (anel.versao, anel.versao_atrasadas)
+        try:
+            self._segmento.publicar({"limite": self._limite, "versoes": versoes}, arrays)
+            self._versao_segmento = self._segmento.versao()
+        except Exception as e:
+            print(f"[busca-incremental] Erro ao publicar: {e}")
+
+    def atualizar(self):
+        """Busca as leituras novas e acrescenta nos buffers dos sensores."""
+        if self._seguidor() and self._ler_compartilhado():
+            return
+        with self._lock:
+            self.nomes = list(self._fonte_nomes())
+            # Sensores que saíram da configuração deixam de ter buffer
+            anteriores = set(self._aneis)
+            aneis = {nome: anel for nome, anel in self._aneis.items() if nome in self.nomes}
+            if not aneis and self._segmento is not None:
+                self._restaurar_publicado(aneis)
+            gravadas = self._semear(aneis)
+            self._aneis = MappingProxyType(aneis)
+            if self._definir_limite(aneis):
+                # Com o que veio do armazém local já dá para responder; se o
+                # banco estiver fora, a tarefa periódica completa depois
+                self._carregado = True
+
+            query, params = self._montar_query()
+            novas = ler_sql(query, params=params)
+            self.linhas_ultima_busca = len(novas)
+            if not novas.empty:
+                novas = normalizar(novas)
+                for nome, grupo in novas.groupby(novas["nome"].astype(str), sort=False, observed=True):
+                    if nome in self.nomes:
+                        gravadas += self._acrescentar(aneis, nome, grupo)
+
+            self._definir_limite(aneis)
+            # Publica o conjunto de buffers (novos sensores) de uma vez
+            self._aneis = MappingProxyType(aneis)
+            self._carregado = True
+            # Os seguidores remontam todos os buffers a cada publicação: só
+            # publica se algo mudou (leituras gravadas ou sensores incluídos/removidos)
+            mudou = gravadas or set(aneis) != anteriores or self._versao_segmento is None
+            if mudou and self._segmento is not None and lideranca.e_lider():
+                self._publicar()
+
+    def _definir_limite(self, aneis):
+        # A janela é relativa à leitura mais nova vista (de qualquer sensor)
+        ultimos = [anel.ultimo for anel in aneis.values() if anel.ultimo is not None]
+        if ultimos:
+            self._limite = max(ultimos) - int(self.janela.total_seconds() * 1e9)
+        return bool(ultimos)
+
+    def _carregar(self):
+        # Carga inicial sob demanda; sem banco, fica com o que estiver nos buffers
+        if self._carregado or time.monotonic() < self._proxima_carga:
+            return
+        try:
+            self.atualizar()
+        except ERROS_BANCO as e:
+            # Nova tentativa só depois de um ciclo, não a cada consulta
+            self._proxima_carga = time.monotonic() + self._tarefa.intervalo
+            print(f"[busca-incremental] Banco indisponível na carga inicial: {e}")
+
+    def _semear(self, aneis):
+        # Sensores ainda sem leituras começam com o que já existe localmente;
+        # retorna quantas leituras foram gravadas
+        gravadas = 0
+        if self._semente is None:
+            return gravadas
+        desde = agora() - self.janela
+        for nome in self.nomes:
+            if nome in aneis and len(aneis[nome]):
+                continue
+            try:
+                df = self._semente(nome, desde)
+            except Exception as e:
+                print(f"[busca-incremental] Erro ao ler o armazém local ({nome}): {e}")
+                continue
+            if df is not None and not df.empty:
+                gravadas += self._acrescentar(aneis, nome, df)
+        return gravadas
+
+    def serie(self, nome):
+        """
+        Cópia das leituras da janela do sensor:
+        (instantes em ns UTC, {coluna: valores float32}).
+        """
+        nome = str(nome)
+        if self._seguidor() and self._ler_compartilhado():
+            return self._copiar_publicado(nome)
+        self._carregar()
+        anel = self._aneis.get(nome)
+        if anel is None:
+            return np.empty(0, dtype="int64"), {}
+        if self._limite is None:
+            return anel.ultimos()
+        return anel.desde(self._limite)
+
+    def versao(self, nome):
+        """
+        Versão das leituras do sensor: o contador de gravações do seu buffer
+        (anel.py), ou None sem buffer. Muda sempre que alguma leitura é
+        gravada, inclusive uma atrasada que não é a mais recente.
+        """
+        if self._seguidor() and self._ler_compartilhado():
+            return self._versoes_publicadas(str(nome))[0]
+        self._carregar()
+        anel = self._aneis.get(str(nome))
+        return None if anel is None else anel.versao
+
+    def versao_publicada(self):
+        """Versão do segmento compartilhado (só o cabeçalho), ou None sem segmento."""
+        return None if self._segmento is None else self._segmento.versao()
+
+    def versao_atrasadas(self, nome):
+        """
+        Versão (veja `versao`) da última gravação de leituras atrasadas do
+        sensor, ou None. Quem só acrescenta as leituras posteriores à última
+        exibida precisa recarregar tudo se ela for mais nova que a sua versão.
+        """
+        if self._seguidor() and self._ler_compartilhado():
+            return self._versoes_publicadas(str(nome))[1]
+        anel = self._aneis.get(str(nome))
+        return None if anel is None else anel.versao_atrasadas
+
+    def historico(self, nome):
+        """
+        Leituras da janela do sensor como DataFrame (instante + colunas
+        numéricas), em ordem crescente de instante, montado sobre a cópia lida
+        do buffer (sem copiar de novo).
+        """
+        instantes, valores = self.serie(nome)
+        if not len(instantes):
+            return pd.DataFrame()
+        instante = pd.DatetimeIndex(instantes.view("datetime64[ns]")).tz_localize("UTC").tz_convert(TZ_SENSORES)
+        return pd.DataFrame({"instante": instante, **valores}, copy=False)
+
+    def ultimas(self, nome, n):
+        """Retorna as `n` leituras mais recentes do sensor (em ordem crescente de instante)."""
+        return self.historico(nome).tail(n)
+
+
+# Instância compartilhada por todas as sessões do worker
+leituras_recentes = BuscaIncremental(
+    lambda: [s["nome"] for s in sensores_ativos()],
+    janela_horas=BUFFER_JANELA_HORAS,
+    lookback_minutos=BUFFER_LOOKBACK_MIN,
+    intervalo=BUFFER_INTERVALO,
+    capacidade=BUFFER_CAPACIDADE,
+    compartilhado="leituras",
+    semente=lambda nome, desde: armazem_local.ler(nome, inicio=desde),
+)
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+# Mapas de geolocalização dos sensores (folium), servidos como arquivos estáticos.
+#
+# O HTML de cada mapa é gerado uma única vez por sensor e guardado em memória,
+# identificado por um hash do que define o conteúdo (dados do sensor e versão do
+# folium). O folium gera ids aleatórios no HTML, então o hash não é calculado
+# sobre o HTML em si: assim todos os workers do gunicorn geram a mesma URL.
+# A página do sensor usa apenas a URL (/mapas/<sensor>-<hash>.html) no iframe;
+# como a URL muda sempre que o conteúdo muda, o navegador pode guardar o
+# arquivo em cache por tempo indeterminado.
+# O cache em memória é indexado pelas coordenadas, então alterar a posição de um
+# sensor na configuração gera um novo mapa (e uma nova URL) sem reiniciar.
+import hashlib
+from functools import lru_cache
+from urllib.parse import quote
+
+import folium
+
+from sensores import get_sensor
+
+# Cache do navegador para os mapas (1 ano; a URL muda junto com o conteúdo)
+CACHE_CONTROL_MAPAS = "public, max-age=31536000, immutable"
+
+
+def mapa_sensor(nome):
+    """
+    Retorna (html, hash do conteúdo) do mapa do sensor, gerado uma vez para
+    cada posição do sensor.
+    """
+    sensor = get_sensor(nome)
+    return _gerar_mapa(sensor["nome"], sensor["lat"], sensor["lon"])
+
+
+@lru_cache(maxsize=256)
+def _gerar_mapa(nome, lat, lon):
+    m = folium.Map(
+        location=[lat, lon],
+        zoom_start=25,
+        tiles='https://tile.openstreetmap.org/{z}/{x}/{y}.png',
+        attr='&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors'
+    )
+
+    # Marcador estilizado
+    folium.Marker(
+        location=[lat, lon],
+        popup=folium.Popup(f"<b>Sensor {nome}</b><br>Status: OK", max_width=300),
+        tooltip="Clique aqui",
+        icon=folium.Icon(color='black', icon='fas fa-broadcast-tower', prefix='fa') # Usado o prefix='fa', para informar que o ícone é do fontawesome
+    ).add_to(m)
+
+    # Renderiza em memória (sem gravar arquivo no diretório de trabalho)
+    html = m.get_root().render()
+    conteudo = f"{folium.__version__}|{nome}|{lat}|{lon}"
+    return html, hashlib.sha1(conteudo.encode("utf-8")).hexdigest()[:12]
+
+
+def url_mapa(nome):
+    """URL do mapa do sensor, versionada pelo hash do conteúdo."""
+    _, hash_conteudo = mapa_sensor(nome)
+    return f"/mapas/{quote(nome)}-{hash_conteudo}.html"
+
+
+def resposta_mapa(arquivo):
+    """
+    Resolve '<sensor>-<hash>.html' para o HTML do mapa. Retorna None se o
+    sensor não existir ou se o hash não corresponder ao mapa atual.
+    """
+    if not arquivo.endswith(".html") or "-" not in arquivo:
+        return None
+    nome, hash_pedido = arquivo[:-len(".html")].rsplit("-", 1)
+    if get_sensor(nome) is None:
+        return None
+    html, hash_conteudo = mapa_sensor(nome)
+    if hash_pedido != hash_conteudo:
+        return None
+    return html
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+# Normalização das leituras na carga (antes de entrarem nos buffers/armazém).
+#
+# O banco guarda o momento da leitura em duas colunas: `data` e `hora_formatada`
+# (texto). Em vez de ordenar por essas duas colunas e plotar a hora em texto
+# (o que embaralha o eixo X do gráfico de 24h na virada do dia), cada leitura
+# ganha uma única coluna `instante`: um timestamp com fuso horário (TZ_SENSORES),
+# calculado uma vez na carga e usado para ordenar, recortar janelas, agregar e
+# plotar.
+#
+# Os valores (distância, cota, % alerta, temperatura) chegam como texto com
+# vírgula decimal. Eles também são convertidos uma única vez, de forma
+# vetorizada, para colunas float32 (e `nome` para categórico); o restante do
+# código trabalha só com números (NaN = sem valor). As falhas de conversão são
+# contadas por coluna (veja `estatisticas_conversao`).
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+TZ_SENSORES = os.environ.get("TZ_SENSORES", "America/Sao_Paulo")
+
+COLUNAS_NUMERICAS = ["distancia", "cota", "percentual_alerta", "temperatura"]
+
+# Contadores de conversão (por processo)
+_lock_stats = threading.Lock()
+_stats = {"linhas": 0, "falhas": {coluna: 0 for coluna in COLUNAS_NUMERICAS}}
+
+
+def instantes(df):
+    """
+    Timestamp (com fuso) de cada leitura: o dia de `data` com a hora de
+    `hora_formatada`. Onde a hora não puder ser lida, vale `data` como está.
+    """
+    data = pd.to_datetime(df["data"], errors="coerce")
+    if data.dt.tz is not None:
+        data = data.dt.tz_convert(TZ_SENSORES).dt.tz_localize(None)
+    instante = data
+    if "hora_formatada" in df.columns:
+        hora = df["hora_formatada"].astype(str).str.strip()
+        # "HH:MM" -> "HH:MM:SS"
+        hora = hora.str.replace(r"^(\d{1,2}:\d{2})$", r"\1:00", regex=True)
+        instante = (data.dt.normalize() + pd.to_timedelta(hora, errors="coerce")).fillna(data)
+    return instante.dt.tz_localize(TZ_SENSORES, ambiguous="NaT", nonexistent="shift_forward")
+
+
+def normalizar_tempo(df):
+    """
+    Adiciona a coluna `instante` (se ainda não existir) e ordena as leituras
+    por ela. Leituras sem instante válido são descartadas.
+    """
+    if df is None or df.empty or "instante" in df.columns:
+        return df
+    df = df.assign(instante=instantes(df)).dropna(subset=["instante"])
+    return df.sort_values("instante", kind="stable").reset_index(drop=True)
+
+
+def para_float(valores):
+    """
+    Converte valores do banco (números ou textos como "5,88" / "5.88%") para
+    um array float64, com NaN onde não for possível converter.
+    """
+    serie = pd.Series(np.atleast_1d(np.asarray(valores, dtype=object)))
+    if pd.api.types.is_numeric_dtype(serie.infer_objects()):
+        return pd.to_numeric(serie, errors="coerce").to_numpy(dtype="float64")
+    texto = serie.astype(str).str.strip().str.rstrip("%").str.replace(",", ".", regex=False)
+    return pd.to_numeric(texto, errors="coerce").to_numpy(dtype="float64")
+
+
+def normalizar_numeros(df):
+    """
+    Converte as colunas numéricas para float32 e `nome` para categórico.
+    Colunas já convertidas não são tocadas. As falhas (valor preenchido que
+    não virou número) ficam em `df.attrs["falhas_conversao"]` e nos contadores.
+    """
+    if df is None or df.empty:
+        return df
+    convertidas, falhas = {}, {}
+    for coluna in COLUNAS_NUMERICAS:
+        if coluna not in df.columns or df[coluna].dtype == "float32":
+            continue
+        original = df[coluna]
+        valores = para_float(original)
+        if pd.api.types.is_numeric_dtype(original):
+            falhas[coluna] = 0
+        else:
+            preenchido = original.notna().to_numpy() & (original.astype(str).str.strip() != "").to_numpy()
+            falhas[coluna] = int((np.isnan(valores) & preenchido).sum())
+        convertidas[coluna] = valores.astype("float32")
+    if "nome" in df.columns and not isinstance(df["nome"].dtype, pd.CategoricalDtype):
+        convertidas["nome"] = df["nome"].astype(str).astype("category")
+    if not convertidas:
+        return df
+    df = df.assign(**convertidas)
+    df.attrs["falhas_conversao"] = falhas
+    with _lock_stats:
+        _stats["linhas"] += len(df)
+        for coluna, total in falhas.items():
+            _stats["falhas"][coluna] += total
+    return df
+
+
+def normalizar(df):
+    """Normalização completa de um lote vindo do banco (instante + números)."""
+    return normalizar_numeros(normalizar_tempo(df))
+
+
+def estatisticas_conversao():
+    """Linhas normalizadas e falhas de conversão por coluna (desde o início do processo)."""
+    with _lock_stats:
+        return {"linhas": _stats["linhas"], "falhas": dict(_stats["falhas"])}
+
+
+def para_instante(valor):
+    """Converte um datetime (sem fuso = horário local dos sensores) em Timestamp com fuso."""
+    valor = pd.Timestamp(valor)
+    if valor.tzinfo is None:
+        return valor.tz_localize(TZ_SENSORES)
+    return valor.tz_convert(TZ_SENSORES)
+
+
+def agora():
+    """Instante atual com fuso (TZ_SENSORES), independente do fuso do servidor."""
+    return pd.Timestamp.now(tz=TZ_SENSORES)
+
+
+def para_banco(instante):
+    """Converte um instante com fuso no datetime local (sem fuso) usado nas queries."""
+    return para_instante(instante).tz_localize(None).to_pydatetime()
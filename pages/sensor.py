@@ -0,0 +1,537 @@
+# -*- coding: utf-8 -*-
+# Página individual de sensor (template único para todos os sensores).
+#
+# O layout é gerado por `layout(nome)` a partir do registro de sensores e
+# os callbacks usam ids com pattern-matching ({"type": ..., "sensor": nome}),
+# então um único conjunto de callbacks atende todas as páginas de sensor.
+#
+# Os layouts são montados por factories com cache: o mapa é gerado uma única
+# vez por sensor (mapas.py, servido por URL) e a parte com dados fica em cache
+# por CACHE_TTL segundos, de modo que navegar entre páginas de sensor não
+# consulta o banco a cada clique. A chave do cache inclui a versão do registro,
+# então uma alteração no arquivo de configuração vale já na próxima navegação.
+
+import dash
+from dash import html, dcc, Input, Output, State, ALL, MATCH, ClientsideFunction, Patch, callback, clientside_callback, no_update
+from dash.exceptions import PreventUpdate
+import dash_bootstrap_components as dbc
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from sqlalchemy import text
+import os
+
+from armazem import armazem_local
+from cache import cache_ttl
+from classificacao import classificador_atual
+from db import ERROS_BANCO, ler_sql
+from incremental import leituras_recentes
+from mapas import url_mapa
+from normalizacao import COLUNAS_NUMERICAS, agora, normalizar
+from reducao import fim_primeiro_balde, reduzir
+from sensores import get_sensor, versao_config
+
+# Tempo (s) que o layout de uma página de sensor fica em cache
+CACHE_TTL = int(os.environ.get("SENSOR_CACHE_TTL", "20"))
+# Pontos acrescentados aos gráficos (extendData) antes de reenviar a figura inteira
+GRAFICO_RECONSTRUIR = int(os.environ.get("GRAFICO_RECONSTRUIR", "120"))
+# Linhas da tabela de dados recentes
+LINHAS_TABELA = 10
+
+def formatar(valor, casas=2, sufixo=""):
+    """Formata um valor já normalizado (float; None/NaN = sem valor)."""
+    if valor is None or pd.isna(valor):
+        return "--"
+    return f"{valor:.{casas}f}{sufixo}"
+
+# === QUERIES (parametrizadas pelo nome do sensor) ===
+# Query para dados históricos do sensor específico
+query_historico = text("""
+SELECT TOP 48 * FROM dados_sensores
+    WHERE nome = :nome
+    ORDER BY data DESC, hora_formatada DESC
+""")
+# Contagem de registros do dia para todos os sensores, feita no servidor.
+# Com o índice (nome, data) de sql/indices.sql é uma busca por faixa no índice,
+# sem trazer o histórico para o pandas.
+query_registros_hoje = text("""
+SELECT nome, COUNT(*) AS total FROM dados_sensores
+    WHERE data >= CAST(GETDATE() AS date)
+      AND data < DATEADD(day, 1, CAST(GETDATE() AS date))
+    GROUP BY nome
+""")
+
+
+def figura_distancia(df_hist, sensor):
+    """Gráfico de histórico de distância com as linhas de atenção/alerta/crítico."""
+    # Valores para as % de atenção, alerta e crítico do gráfico de linhas
+    atencao = sensor["distancia"]["atencao"]
+    alerta  = sensor["distancia"]["alerta"]
+    critico = sensor["distancia"]["critico"]
+
+    fig_dist = px.line(df_hist.sort_values('instante'), x='instante', y='distancia', markers=True, color_discrete_sequence=["#0199ff"], line_shape='spline') # color_discrete_sequence - define a cor da linha na criação do gráfico
+    fig_dist.update_layout(xaxis=dict(showgrid=False),
+                           yaxis=dict(showgrid=False,range=[0, critico]), # Altera o tamanho do eixo Y
+                           plot_bgcolor='rgba(0,0,0,0)',
+                           paper_bgcolor='rgba(0,0,0,0)',
+                           font_color='white',
+                           xaxis_title="Hora",
+                           yaxis_title="Distância (cm)",
+    )
+    fig_dist.update_traces(line=dict(width=5),        # Define o tamanho da linha do gráfico
+                           marker=dict(size=10)       # Define o tamanho do marcador
+    )
+
+    # Adiciona as linhas com valores fixos no gráfico de Histórico de Distância
+    fig_dist.add_hline(y=atencao, line_color="yellow", line_dash="dash", annotation_text=f"Atenção ({atencao/critico*100:.2f}%)", annotation_position="top right")
+    fig_dist.add_hline(y=alerta, line_color="orange", line_dash="dash", annotation_text=f"Alerta ({alerta/critico*100:.2f}%)", annotation_position="top right")
+    fig_dist.add_hline(y=critico, line_color="red", line_dash="dash", annotation_text="Crítico (100%)", annotation_position="top right")
+    return fig_dist
+
+
+@cache_ttl(CACHE_TTL)
+def registros_hoje():
+    """Retorna {nome: quantidade de registros de hoje} para todos os sensores."""
+    df = ler_sql(query_registros_hoje)
+    return {str(nome): int(total) for nome, total in zip(df["nome"], df["total"])}
+
+
+def layout(nome):
+    """Layout da página do sensor (em cache por CACHE_TTL segundos)."""
+    return _layout(nome, versao_config())
+
+
+@cache_ttl(CACHE_TTL)
+def _layout(nome, versao):
+    sensor = get_sensor(nome)
+    classificador = classificador_atual()
+
+    # Últimas leituras vêm do buffer incremental; se o sensor não tiver nenhuma
+    # leitura dentro da janela do buffer, do armazém local e, por último, do banco
+    try:
+        df_hist = leituras_recentes.ultimas(nome, 48)
+    except ERROS_BANCO:
+        df_hist = pd.DataFrame()
+    if df_hist.empty:
+        df_hist = armazem_local.ultimas(nome, 48)
+    if df_hist.empty:
+        try:
+            df_hist = normalizar(ler_sql(query_historico, params={"nome": nome}))
+        except ERROS_BANCO:
+            # Sem leitura nenhuma: a página abre com os gráficos vazios
+            df_hist = pd.DataFrame(columns=["instante", *COLUNAS_NUMERICAS])
+    df_top_1 = df_hist.tail(1)
+    row = df_top_1.iloc[0] if not df_top_1.empty else pd.Series(dtype=object)
+    try:
+        total_registros = registros_hoje().get(nome, 0)
+        status = "Online" if total_registros > 0 else "Offline"
+    except ERROS_BANCO:
+        # Sem banco, a página continua com os dados em memória
+        total_registros, status = "--", "Sem conexão com o banco"
+    online = status == "Online"
+    cor = "success" if online else "danger"
+    icone = "fas fa-check-circle" if online else "fas fa-exclamation-triangle"
+
+    dados_atuais_layout = html.Div([
+            dbc.Row([
+                dbc.Col([
+                    html.H5(formatar(row.get('distancia'), sufixo=" cm"), id={"type": "distancia-atual", "sensor": nome}, className="text-light"),
+                    html.Small("Distância")
+                ], md=3),
+                dbc.Col([
+                    html.H5(formatar(row.get('cota')), id={"type": "cota-atual", "sensor": nome},
+                        style={"color": classificador.cor(row.get('cota'), nome, "COTA")}),  # ← COR DINÂMICA,
+                    html.Small("Cota")
+                ], md=3),
+                dbc.Col([
+                    html.H5(formatar(row.get('percentual_alerta'), sufixo="%"), id={"type": "alerta-atual", "sensor": nome},
+                        style={"color": classificador.cor(row.get('percentual_alerta'), nome, "ALERTA")}),  # ← COR DINÂMICA,
+                    html.Small("% Alerta")
+                ], md=3),
+                dbc.Col([
+                    html.H5(formatar(row.get('temperatura'), casas=1, sufixo="°C"), id={"type": "temperatura-atual", "sensor": nome}, className="text-light"),
+                    html.Small("Temperatura")
+                ], md=3)
+            ]),
+            html.Hr(),
+            html.P(f"Última atualização: {row['instante'].strftime('%d/%m/%Y %H:%M:%S') if 'instante' in row else '--'}", style={"fontSize": "12px", "color": "#ccc"})
+        ])
+
+    status_layout = html.Div([
+            html.H5([html.I(className=f"{icone} me-2"), status], className=f"text-{cor}"),
+            html.P(f"Registros hoje: {total_registros}")
+        ])
+
+    debug_layout = html.Pre(
+        f"Última atualização: {agora().strftime('%H:%M:%S')}\n"
+        f"Status: OK - Dados carregados em cache.",
+        style={"color": "green"}
+    )
+
+    # Gera a figura do gráfico de distância
+    fig_dist = figura_distancia(df_hist, sensor)
+
+    return html.Div([
+        html.Div([
+            # Cabeçalho da página
+            dbc.Row([
+                dbc.Col([
+                    html.Div([
+                        html.H2(
+                            f"Sensor {nome} - {sensor['endereco']}",
+                            style={"color": "#f8f9fa",
+                                   "marginBottom": "30px",
+                                   "textAlign": "center",
+                                   "textShadow": "1px 1px 2px rgba(0,0,0,0.5)"}
+                        ),
+                        dbc.Button(
+                            [html.I(className="fas fa-arrow-left me-2"), "Voltar ao Dashboard"],
+                            href="/",
+                            color="info",
+                            className="mb-3"
+                        )
+                    ])
+                ])
+            ]),
+
+            # Linha com cards de informações atuais
+            dbc.Container([
+                dbc.Row([
+                    dbc.Col([
+                        dbc.Card([
+                            dbc.CardHeader(
+                                html.H4("Dados Atuais", className="text-white mb-0"),
+                                style={"backgroundColor": "#20497e"}
+                            ),
+                            dbc.CardBody(dados_atuais_layout, style={"backgroundColor": "#2a5a8f", "color": "white"})
+                        ], style={"marginBottom": "20px"})
+                    ], md=6),
+
+                    dbc.Col([
+                        dbc.Card([
+                            dbc.CardHeader(
+                                html.H4("Status do Sistema", className="text-white mb-0"),
+                                style={"backgroundColor": "#20497e"}
+                            ),
+                            dbc.CardBody([
+                                    status_layout,
+                                    html.Div(debug_layout, style={
+                                        "backgroundColor": "#f8f9fa",
+                                        "padding": "10px",
+                                        "border": "1px solid #ccc",
+                                        "borderRadius": "5px",
+                                        "fontFamily": "monospace",
+                                        "fontSize": "0.9em",
+                                        "color": "#000",
+                                        "marginTop": "10px",
+                                        "height": "52px",
+                                        "overflowY": "auto"
+                                    })
+                            ], style={"backgroundColor": "#2a5a8f", "color": "white"})
+                        ], style={"marginBottom": "20px"})
+                    ], md=6)
+                ]),
+
+                dbc.Row([
+                    dbc.Col([
+                        dbc.Card([
+                            dbc.CardHeader(
+                                html.H4("Histórico de Distância (últimas 24h)", className="text-white mb-0"),
+                                style={"backgroundColor": "#20497e"}
+                            ),
+                            dbc.CardBody(
+                                dcc.Graph(figure=fig_dist),
+                                style={"backgroundColor": "#2a5a8f", "color": "white"})
+                        ], style={"marginBottom": "20px"})
+                    ], md=8),
+
+                    dbc.Col([
+                        dbc.Card([
+                            dbc.CardHeader(
+                                html.H4("Geolocalização do Sensor", className="text-white mb-0"),
+                                style={"backgroundColor": "#20497e"}
+                            ),
+                            dbc.CardBody(
+                                html.Iframe(src=url_mapa(nome),
+                                            width="100%", height="445 "),
+                                style={"backgroundColor": "#2a5a8f", "color": "white"})
+                        ], style={"marginBottom": "20px"})
+                    ], md=4)
+                ]),
+            ], fluid=True) # Fim do Container
+        ], style={"padding": "20px", "backgroundColor": "#173358"}),
+
+        # Gráficos
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader("Histórico de Cota (Últimas 24h)",
+                                style={"backgroundColor": "#20497e", "color": "#fff"}),
+                    dbc.CardBody([
+                        dcc.Graph(id={"type": "grafico-cota", "sensor": nome})
+                    ])
+                ], style={"marginBottom": "20px"})
+            ], ),
+
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader("Histórico de Distância (Últimas 24h)",
+                                  style={"backgroundColor": "#20497e", "color": "#fff"}),
+                    dbc.CardBody([
+                        dcc.Graph(id={"type": "grafico-distancia", "sensor": nome})
+                    ])
+                ], style={"marginBottom": "20px"})
+            ], ),
+        ]),
+
+        # Tabela com dados recentes
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader("Dados Recentes",
+                                    style={"backgroundColor": "#20497e", "color": "#fff"}),
+                    dbc.CardBody([
+                        html.Div(id={"type": "tabela-dados", "sensor": nome})
+                    ])
+                ])
+            ])
+        ]),
+
+        # Componente de atualização automática (fallback quando o canal de
+        # eventos não está conectado; ligado/desligado por assets/agenda.js)
+        dcc.Interval(
+            id={"type": "interval-sensor", "sensor": nome},
+            interval=20*1000,  # Atualiza a cada 20 segundos (aba visível)
+            n_intervals=0
+        ),
+        # Recebe a sequência da mensagem do canal de eventos com leituras novas do sensor
+        dcc.Store(id={"type": "evento-sensor", "sensor": nome}),
+        # O que o navegador já exibe (para enviar só os pontos novos, ou nada)
+        dcc.Store(id={"type": "versao-sensor", "sensor": nome})
+    ], style={"backgroundColor": "#173358", "minHeight": "100vh", "padding": "20px"})
+
+def expiracao_serie(df_hist, coluna):
+    """
+    Para uma série que o gráfico mostra reduzida, o instante (ns, UTC, em
+    texto) em que termina o seu balde mais antigo: quando a janela passa dele,
+    o balde já saiu e a figura precisa ser refeita. None se a série não é
+    reduzida (um ponto por leitura).
+    """
+    fim = fim_primeiro_balde(df_hist[['instante', coluna]], 'instante', coluna)
+    return None if fim is None else str(fim.value)
+
+def figuras_sensor(df_hist, nome):
+    """
+    Figuras completas (com layout) dos gráficos de cota e distância, a
+    quantidade de pontos de cada uma e quando cada uma expira (veja
+    expiracao_serie).
+    """
+    pontos = [0, 0]
+    expira = [None, None]
+
+    # Gráfico de Cota (série reduzida a ~PONTOS_GRAFICO pontos, mantendo os picos)
+    fig_cota = go.Figure()
+    if not df_hist.empty and 'cota' in df_hist.columns:
+        serie_cota = reduzir(df_hist[['instante', 'cota']], 'instante', 'cota')
+        pontos[0] = len(serie_cota)
+        expira[0] = expiracao_serie(df_hist, 'cota')
+        fig_cota.add_trace(go.Scatter(
+            x=serie_cota['instante'],
+            y=serie_cota['cota'],
+            mode='lines+markers',
+            name='Cota',
+            line=dict(color='#1E90FF', width=2),
+            # Cor de cada ponto pela faixa da cota (mesma regra dos cards)
+            marker=dict(color=classificador_atual().cores(serie_cota['cota'], nome, "COTA"))
+        ))
+
+    fig_cota.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font_color='white',
+        xaxis=dict(gridcolor='rgba(255,255,255,0.2)'),
+        yaxis=dict(gridcolor='rgba(255,255,255,0.2)'),
+        title="Variação da Cota"
+    )
+
+    # Gráfico de Distância
+    fig_dist = go.Figure()
+    if not df_hist.empty and 'distancia' in df_hist.columns:
+        serie_dist = reduzir(df_hist[['instante', 'distancia']], 'instante', 'distancia')
+        pontos[1] = len(serie_dist)
+        expira[1] = expiracao_serie(df_hist, 'distancia')
+        fig_dist.add_trace(go.Scatter(
+            x=serie_dist['instante'],
+            y=serie_dist['distancia'],
+            mode='lines+markers',
+            name='Distância',
+            line=dict(color='#FFA500', width=2)
+        ))
+
+    fig_dist.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font_color='white',
+        xaxis=dict(gridcolor='rgba(255,255,255,0.2)'),
+        yaxis=dict(gridcolor='rgba(255,255,255,0.2)'),
+        title="Variação da Distância"
+    )
+
+    return fig_cota, fig_dist, pontos, expira
+
+def extensoes_sensor(novos, nome, maximos):
+    """
+    Pontos novos no formato do `extendData` do dcc.Graph, para cada gráfico:
+    [dados, [traço], máximo de pontos]. `maximos` diz, por gráfico, quantos
+    pontos manter (as leituras da janela, assim o corte é por tempo) ou None
+    para não descartar nenhum (série reduzida; ela é refeita quando expira).
+    """
+    extensoes = []
+    for coluna, maximo in zip(('cota', 'distancia'), maximos):
+        # Como na figura completa, leituras sem valor ficam de fora
+        serie = novos[novos[coluna].notna()]
+        x = [instante.isoformat() for instante in serie['instante']]
+        # Leituras são float32: arredonda para não enviar o ruído da conversão
+        dados = {"x": [x], "y": [serie[coluna].astype('float64').round(4).tolist()]}
+        if coluna == 'cota':
+            dados["marker.color"] = [list(classificador_atual().cores(serie['cota'], nome, "COTA"))]
+        extensoes.append([dados, [0]] if maximo is None else [dados, [0], maximo])
+    return extensoes
+
+def tabela_recentes(df):
+    """Tabela com as leituras de `df`, da mais recente para a mais antiga."""
+    df = df.iloc[::-1]
+    df = df.assign(data=df['instante'].dt.strftime('%d/%m/%Y %H:%M:%S'))
+    return dbc.Table.from_dataframe(
+        df[['data', 'distancia', 'cota', 'percentual_alerta', 'temperatura']].astype({'distancia': 'float64', 'cota': 'float64', 'percentual_alerta': 'float64', 'temperatura': 'float64'}).round(2),
+        striped=True,
+        bordered=True,
+        hover=True,
+        style={'color': 'white'}
+    )
+
+def patch_tabela(novos, linhas):
+    """
+    Patch da tabela de recentes (com `linhas` linhas no navegador): as leituras
+    novas entram no topo e as mais antigas saem, mantendo LINHAS_TABELA linhas.
+    """
+    novos = novos.tail(LINHAS_TABELA)
+    patch = Patch()
+    corpo = patch["props"]["children"][1]["props"]["children"]
+    # Linhas da mais antiga para a mais nova: cada uma entra acima da anterior
+    for linha in reversed(tabela_recentes(novos).children[1].children):
+        corpo.prepend(linha)
+    total = linhas + len(novos)
+    for _ in range(max(0, total - LINHAS_TABELA)):
+        del corpo[LINHAS_TABELA]
+    return patch, min(total, LINHAS_TABELA)
+
+# Callback para atualizar os dados da página (um único callback para todos os sensores).
+# O store "versao-sensor" guarda o que o navegador já tem: a versão das leituras
+# do buffer (contador de gravações), o instante da leitura mais recente exibida,
+# a versão da configuração, os pontos de cada gráfico e as linhas da tabela. Sem
+# leitura gravada, a resposta é vazia (204). Com leituras
+# novas, os gráficos recebem só os pontos novos (extendData) e a tabela só as
+# linhas novas (Patch), e os pontos que saíram da janela de 24h são descartados
+# (veja extensoes_sensor); a figura inteira só é enviada na primeira carga,
+# quando a configuração muda, quando chegam leituras atrasadas (anteriores à
+# última exibida), quando o balde mais antigo de uma série reduzida sai da
+# janela ou a cada GRAFICO_RECONSTRUIR pontos acrescentados (para
+# refazer a redução da série).
+@callback(
+    [Output({"type": "distancia-atual", "sensor": MATCH}, "children"),
+     Output({"type": "cota-atual", "sensor": MATCH}, "children"),
+     Output({"type": "alerta-atual", "sensor": MATCH}, "children"),
+     Output({"type": "temperatura-atual", "sensor": MATCH}, "children"),
+     Output({"type": "grafico-cota", "sensor": MATCH}, "figure"),
+     Output({"type": "grafico-distancia", "sensor": MATCH}, "figure"),
+     Output({"type": "grafico-cota", "sensor": MATCH}, "extendData"),
+     Output({"type": "grafico-distancia", "sensor": MATCH}, "extendData"),
+     Output({"type": "tabela-dados", "sensor": MATCH}, "children"),
+     Output({"type": "versao-sensor", "sensor": MATCH}, "data")],
+    [Input({"type": "interval-sensor", "sensor": MATCH}, "n_intervals"),
+     Input({"type": "evento-sensor", "sensor": MATCH}, "data")],
+    [State({"type": "interval-sensor", "sensor": MATCH}, "id"),
+     State({"type": "versao-sensor", "sensor": MATCH}, "data")]
+)
+def update_sensor(n, seq_evento, id_interval, exibido):
+    nome = id_interval["sensor"]
+    config = versao_config()
+    try:
+        # Versão (contador de gravações) em texto: não cabe exata num número do JavaScript
+        versao = leituras_recentes.versao(nome)
+    except ERROS_BANCO as e:
+        # Sem banco e sem leituras em memória: a tela fica como está
+        print(f"Banco indisponível ao atualizar sensor {nome}: {e}")
+        raise PreventUpdate
+    versao = None if versao is None else str(versao)
+    if exibido and exibido.get("versao") == versao and exibido["config"] == config:
+        # Nenhuma leitura gravada desde o último tick
+        raise PreventUpdate
+    try:
+        # Uma única leitura do buffer (últimas 24h, ordem crescente de instante,
+        # copiada do buffer circular); a leitura atual e a tabela de
+        # recentes são derivadas dela
+        df_hist = leituras_recentes.historico(nome)
+        df_atual = df_hist.tail(1)
+
+        if df_atual.empty:
+            return ("--", "--", "--", "--", {}, {}, no_update, no_update, "Sem dados disponíveis",
+                    {"versao": versao, "instante": None, "config": config, "pontos": [0, 0], "expira": [None, None],
+                     "acrescentados": 0, "linhas": 0})
+
+        # Valores atuais
+        distancia = formatar(df_atual['distancia'].iloc[0], sufixo=" cm") if 'distancia' in df_atual.columns else "--"
+        cota = formatar(df_atual['cota'].iloc[0]) if 'cota' in df_atual.columns else "--"
+        alerta = formatar(df_atual['percentual_alerta'].iloc[0], sufixo="%") if 'percentual_alerta' in df_atual.columns else "--"
+        temperatura = formatar(df_atual['temperatura'].iloc[0], casas=1, sufixo="°C") if 'temperatura' in df_atual.columns else "--"
+        # Instante (ns) da leitura mais recente exibida: a partir dele os pontos são acrescentados
+        ultimo = str(df_atual['instante'].iloc[0].value)
+
+        # Só os pontos e linhas novos, se o navegador já tem as figuras desta configuração
+        if exibido and exibido["config"] == config and exibido["instante"] and all(exibido["pontos"]):
+            desde = pd.Timestamp(int(exibido["instante"]), tz="UTC")
+            novos = df_hist[df_hist['instante'] > desde]
+            acrescentados = exibido["acrescentados"] + len(novos)
+            # Série reduzida: refaz a figura quando o balde mais antigo sai da janela
+            expira = exibido.get("expira")
+            inicio_janela = df_hist['instante'].iloc[0].value
+            expirou = expira is None or any(e is not None and inicio_janela > int(e) for e in expira)
+            # Leituras atrasadas (anteriores à última exibida) só entram refazendo tudo
+            atrasadas = leituras_recentes.versao_atrasadas(nome)
+            atrasou = atrasadas is not None and (exibido.get("versao") is None or atrasadas > int(exibido["versao"]))
+            if len(novos) and acrescentados <= GRAFICO_RECONSTRUIR and exibido["linhas"] and not expirou and not atrasou:
+                # Sem redução, o gráfico tem um ponto por leitura: mantém as da janela
+                maximos = [None if e is not None else int(df_hist[coluna].notna().sum())
+                           for coluna, e in zip(('cota', 'distancia'), expira)]
+                ext_cota, ext_dist = extensoes_sensor(novos, nome, maximos)
+                tabela, linhas = patch_tabela(novos, exibido["linhas"])
+                return (distancia, cota, alerta, temperatura, no_update, no_update, ext_cota, ext_dist, tabela,
+                        {**exibido, "versao": versao, "instante": ultimo, "acrescentados": acrescentados,
+                         "linhas": linhas})
+
+        # Carga completa: figuras (com layout) e tabela com os últimos dados
+        fig_cota, fig_dist, pontos, expira = figuras_sensor(df_hist, nome)
+        df_recentes = df_hist.tail(LINHAS_TABELA)
+        tabela = tabela_recentes(df_recentes)
+        return (distancia, cota, alerta, temperatura, fig_cota, fig_dist, no_update, no_update, tabela,
+                {"versao": versao, "instante": ultimo, "config": config, "pontos": pontos, "expira": expira,
+                 "acrescentados": 0,
+                 "linhas": len(df_recentes)})
+
+    except ERROS_BANCO as e:
+        print(f"Banco indisponível ao atualizar sensor {nome}: {e}")
+        raise PreventUpdate
+    except Exception as e:
+        print(f"Erro ao atualizar sensor {nome}: {str(e)}")
+        return "Erro", "Erro", "Erro", "Erro", {}, {}, no_update, no_update, f"Erro: {str(e)}", None
+
+# Mensagens do canal de eventos com leituras novas deste sensor disparam a
+# atualização da página (veja assets/eventos.js)
+clientside_callback(
+    ClientsideFunction(namespace="eventos", function_name="sensores"),
+    Output({"type": "evento-sensor", "sensor": ALL}, "data"),
+    Input("evento-servidor", "data"),
+    State({"type": "evento-sensor", "sensor": ALL}, "id"),
+    prevent_initial_call=True
+)
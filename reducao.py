@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# Redução de pontos das séries antes de montar os gráficos.
+#
+# Um gráfico não consegue mostrar mais pontos do que a sua largura em pixels,
+# então séries longas (dias/semanas de leituras) são reduzidas no servidor para
+# ~PONTOS_GRAFICO pontos. Assim o tamanho da resposta e o tempo de desenho no
+# navegador não dependem do período pedido.
+#
+# Dois métodos, ambos retornando os índices dos pontos mantidos (em ordem):
+# - "min_max": divide a série em baldes e mantém o menor e o maior valor de cada
+#   um. Garante que todo pico (e todo vale) aparece no gráfico, por isso é o
+#   padrão: para monitoramento de cheias o pico é o que importa.
+# - "lttb" (Largest-Triangle-Three-Buckets): mantém um ponto por balde,
+#   escolhido para preservar a forma visual da curva.
+import os
+
+import numpy as np
+import pandas as pd
+
+PONTOS_GRAFICO = int(os.environ.get("PONTOS_GRAFICO", "600"))
+REDUCAO_METODO = os.environ.get("REDUCAO_METODO", "min_max")
+
+
+def _numerico(x):
+    # Datas (com ou sem fuso) viram números (ns) para o cálculo das áreas do LTTB
+    if pd.api.types.is_datetime64_any_dtype(x):
+        return pd.Series(x).to_numpy(dtype="datetime64[ns]").astype("int64").astype("float64")
+    return np.asarray(x, dtype="float64")
+
+
+def min_max(y, n):
+    """Índices do menor e do maior valor de cada um de n/2 baldes."""
+    y = np.asarray(y, dtype="float64")
+    total = len(y)
+    baldes = max(1, n // 2)
+    balde = np.arange(total) * baldes // total
+    # Ordena por (balde, valor): o primeiro de cada balde é o mínimo, o último o máximo
+    ordem = np.lexsort((y, balde))
+    inicio = np.flatnonzero(np.r_[True, balde[ordem][1:] != balde[ordem][:-1]])
+    fim = np.r_[inicio[1:], total] - 1
+    return np.unique(np.concatenate([ordem[inicio], ordem[fim]]))
+
+
+def lttb(x, y, n):
+    """Índices escolhidos pelo Largest-Triangle-Three-Buckets (primeiro e último sempre mantidos)."""
+    x = _numerico(x)
+    y = np.asarray(y, dtype="float64")
+    total = len(y)
+    # Pontos internos divididos em n-2 baldes
+    limites = np.linspace(1, total - 1, n - 1).astype(int)
+    indices = np.empty(n, dtype=int)
+    indices[0], indices[-1] = 0, total - 1
+    anterior = 0
+    for i in range(n - 2):
+        inicio, fim = limites[i], limites[i + 1]
+        # Média do balde seguinte (ou o último ponto, no último balde)
+        prox_inicio, prox_fim = fim, limites[i + 2] if i + 2 < len(limites) else total
+        mx = x[prox_inicio:prox_fim].mean()
+        my = y[prox_inicio:prox_fim].mean()
+        ax, ay = x[anterior], y[anterior]
+        areas = np.abs((ax - mx) * (y[inicio:fim] - ay) - (ax - x[inicio:fim]) * (my - ay))
+        anterior = inicio + int(np.argmax(areas))
+        indices[i + 1] = anterior
+    return indices
+
+
+def reduzir(df, coluna_x, coluna_y, n=None, metodo=None):
+    """
+    Reduz o DataFrame a ~n linhas escolhidas pela coluna `coluna_y` (numérica).
+    Linhas com y inválido são descartadas; séries curtas voltam inteiras.
+    """
+    n = n or PONTOS_GRAFICO
+    metodo = metodo or REDUCAO_METODO
+    df = df[np.isfinite(df[coluna_y].to_numpy(dtype="float64"))]
+    if len(df) <= n or n < 3:
+        return df
+    y = df[coluna_y].to_numpy(dtype="float64")
+    if metodo == "lttb":
+        indices = lttb(df[coluna_x], y, n)
+    else:
+        indices = min_max(y, n)
+    return df.iloc[indices]
+
+
+def _inicio_segundo_balde(total, n, metodo):
+    # Índice da primeira linha do segundo balde (todo o primeiro fica antes dela)
+    if metodo == "lttb":
+        # O primeiro ponto fica sozinho; os baldes começam em `limites`
+        return int(np.linspace(1, total - 1, n - 1).astype(int)[1])
+    baldes = max(1, n // 2)
+    # min_max: a linha i cai no balde i * baldes // total
+    return -(-total // baldes)
+
+
+def fim_primeiro_balde(df, coluna_x, coluna_y, n=None, metodo=None):
+    """
+    Valor de `coluna_x` em que começa o segundo balde da redução que
+    `reduzir` faria (todos os pontos do primeiro balde são anteriores a ele),
+    ou None se a série não seria reduzida.
+    """
+    n = n or PONTOS_GRAFICO
+    metodo = metodo or REDUCAO_METODO
+    df = df[np.isfinite(df[coluna_y].to_numpy(dtype="float64"))]
+    if len(df) <= n or n < 3:
+        return None
+    return df[coluna_x].iloc[_inicio_segundo_balde(len(df), n, metodo)]
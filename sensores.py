@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+# Registro dos sensores do NOAH.
+#
+# Os sensores (identificação, endereço, coordenadas do mapa, faixas de COTA e
+# %ALERTA e linhas de referência do gráfico de distância) ficam num único
+# arquivo de configuração (config/sensores.json, ou o caminho em SENSORES_CONFIG).
+# O arquivo é validado ao carregar e recarregado automaticamente quando muda:
+# cada recarga válida ganha um número de versão, e os caches que dependem do
+# registro (classificador, layouts das páginas, mapas) usam essa versão na
+# chave, então são invalidados sem precisar reiniciar o serviço.
+import json
+import os
+import threading
+import time
+
+ARQUIVO_CONFIG = os.environ.get(
+    "SENSORES_CONFIG",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "config", "sensores.json"),
+)
+# Intervalo mínimo (s) entre verificações de alteração do arquivo
+RECARGA_INTERVALO = int(os.environ.get("SENSORES_RECARGA_INTERVALO", "10"))
+
+FAIXAS_COTA = ("observacao", "alerta", "critico")
+FAIXAS_ALERTA = ("observacao", "atencao", "alerta", "critico")
+LINHAS_DISTANCIA = ("atencao", "alerta", "critico")
+
+
+class ConfiguracaoInvalida(ValueError):
+    """Erro de validação do arquivo de configuração dos sensores."""
+
+
+def _faixas(valor, nomes, contexto):
+    # Converte {"faixa": [inicio, fim]} em {"faixa": (inicio, fim)}; fim null = infinito
+    if not isinstance(valor, dict) or set(valor) != set(nomes):
+        raise ConfiguracaoInvalida(f"{contexto}: faixas devem ser exatamente {list(nomes)}")
+    faixas = {}
+    for nome in nomes:
+        par = valor[nome]
+        if not isinstance(par, (list, tuple)) or len(par) != 2:
+            raise ConfiguracaoInvalida(f"{contexto}: faixa '{nome}' deve ser [inicio, fim]")
+        inicio = float(par[0])
+        fim = float('inf') if par[1] is None else float(par[1])
+        if fim < inicio:
+            raise ConfiguracaoInvalida(f"{contexto}: faixa '{nome}' com fim menor que o início")
+        faixas[nome] = (inicio, fim)
+    inicios = [faixas[nome][0] for nome in nomes]
+    if inicios != sorted(inicios) or len(set(inicios)) != len(inicios):
+        raise ConfiguracaoInvalida(f"{contexto}: as faixas devem estar em ordem crescente")
+    return faixas
+
+
+def _linhas_distancia(valor, contexto):
+    if not isinstance(valor, dict) or set(valor) != set(LINHAS_DISTANCIA):
+        raise ConfiguracaoInvalida(f"{contexto}: distância deve ter {list(LINHAS_DISTANCIA)}")
+    linhas = {nome: float(valor[nome]) for nome in LINHAS_DISTANCIA}
+    if not 0 < linhas["atencao"] <= linhas["alerta"] <= linhas["critico"]:
+        raise ConfiguracaoInvalida(f"{contexto}: distância deve ter 0 < atenção <= alerta <= crítico")
+    return linhas
+
+
+def _alerta(item, nome, padrao):
+    # Sem a chave "alerta", vale `alerta_padrao`; "alerta": null = sem faixas
+    # (o valor fica sem cor, como a COTA dos sensores sem faixas)
+    if "alerta" not in item:
+        return padrao
+    if item["alerta"] is None:
+        return None
+    return _faixas(item["alerta"], FAIXAS_ALERTA, f"sensor {nome} (alerta)")
+
+
+def validar(config):
+    """
+    Valida o conteúdo do arquivo de configuração e retorna a lista de sensores
+    ativos, com as faixas já convertidas e os valores padrão aplicados.
+    """
+    alerta_padrao = _faixas(config.get("alerta_padrao"), FAIXAS_ALERTA, "alerta_padrao")
+    distancia_padrao = _linhas_distancia(config.get("distancia_padrao"), "distancia_padrao")
+
+    sensores, vistos = [], set()
+    for item in config.get("sensores", []):
+        nome = str(item.get("nome", "")).strip()
+        if not nome:
+            raise ConfiguracaoInvalida("sensor sem 'nome'")
+        if nome in vistos:
+            raise ConfiguracaoInvalida(f"sensor {nome} repetido")
+        vistos.add(nome)
+        if not item.get("ativo", True):
+            continue
+        try:
+            lat, lon = float(item["lat"]), float(item["lon"])
+        except (KeyError, TypeError, ValueError):
+            raise ConfiguracaoInvalida(f"sensor {nome}: 'lat' e 'lon' são obrigatórios")
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ConfiguracaoInvalida(f"sensor {nome}: coordenadas inválidas")
+        sensores.append({
+            "nome": nome,
+            "endereco": str(item.get("endereco", "")),
+            "lat": lat,
+            "lon": lon,
+            "cota": _faixas(item["cota"], FAIXAS_COTA, f"sensor {nome} (cota)") if item.get("cota") else None,
+            "alerta": _alerta(item, nome, alerta_padrao),
+            "distancia": _linhas_distancia(item["distancia"], f"sensor {nome} (distancia)") if item.get("distancia") else distancia_padrao,
+        })
+    if not sensores:
+        raise ConfiguracaoInvalida("nenhum sensor ativo")
+    return sensores
+
+
+class Registro:
+    """Versão carregada e validada do arquivo de configuração."""
+
+    def __init__(self, versao, sensores, mtime):
+        self.versao = versao
+        self.sensores = sensores
+        self.por_nome = {s["nome"]: s for s in sensores}
+        self.mtime = mtime
+
+
+_lock = threading.Lock()
+_registro = None
+_ultima_verificacao = 0.0
+_mtime_invalido = None  # mtime do último arquivo rejeitado (para avisar uma vez só)
+
+
+def _carregar(versao):
+    mtime = os.path.getmtime(ARQUIVO_CONFIG)
+    with open(ARQUIVO_CONFIG, "r", encoding="utf-8") as arquivo:
+        sensores = validar(json.load(arquivo))
+    return Registro(versao, sensores, mtime)
+
+
+def registro_atual():
+    """
+    Retorna o registro em uso, recarregando o arquivo se ele mudou. Se a nova
+    versão do arquivo for inválida, o registro anterior continua valendo.
+    """
+    global _registro, _ultima_verificacao, _mtime_invalido
+    agora = time.monotonic()
+    if _registro is not None and agora - _ultima_verificacao < RECARGA_INTERVALO:
+        return _registro
+    with _lock:
+        if _registro is None:
+            # Na inicialização, um arquivo inválido deve impedir o app de subir
+            _registro = _carregar(1)
+        elif agora - _ultima_verificacao >= RECARGA_INTERVALO:
+            try:
+                mtime = os.path.getmtime(ARQUIVO_CONFIG)
+                if mtime not in (_registro.mtime, _mtime_invalido):
+                    _registro = _carregar(_registro.versao + 1)
+                    print(f"[sensores] Configuração recarregada (versão {_registro.versao})")
+            except (OSError, ValueError) as e:
+                _mtime_invalido = mtime if isinstance(e, ValueError) else None
+                print(f"[sensores] Configuração não recarregada: {e}")
+        _ultima_verificacao = agora
+    return _registro
+
+
+def sensores_ativos():
+    """Lista dos sensores ativos (na ordem do arquivo de configuração)."""
+    return registro_atual().sensores
+
+
+def versao_config():
+    """Versão do registro em uso (muda a cada recarga válida do arquivo)."""
+    return registro_atual().versao
+
+
+def get_sensor(nome):
+    """Retorna a entrada do registro para o sensor (ou None se não existir)."""
+    return registro_atual().por_nome.get(str(nome))
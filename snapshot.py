@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+# Serviço de snapshot das últimas leituras de cada sensor.
+#
+# Em vez de cada aba do navegador disparar a query das últimas leituras no
+# banco a cada 20 s, um único refresher em background (um por worker do
+# gunicorn) busca a última linha de cada sensor num intervalo fixo e guarda o
+# resultado como um snapshot imutável e versionado. Os callbacks apenas leem o
+# snapshot atual, então a carga no banco não depende do número de usuários.
+#
+# Com vários workers, só o líder (compartilhado.py) consulta o banco; ele
+# publica cada snapshot num segmento compartilhado e os demais workers apenas
+# leem a versão publicada.
+#
+# A versão do snapshot só avança quando as leituras mudam (os sensores enviam
+# dados bem menos que a cada 20 s). Os callbacks guardam a última versão que o
+# navegador recebeu e, se ela não mudou, não enviam nada.
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+
+import pandas as pd
+
+from compartilhado import SegmentoCompartilhado, lideranca
+from db import ler_sql
+from normalizacao import agora, normalizar_numeros
+from tarefas import TarefaPeriodica
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    Fotografia imutável das últimas leituras, indexada pelo nome do sensor.
+    `versao` cresce a cada mudança das leituras; `atualizado_em` é o momento
+    da última consulta bem-sucedida ao banco.
+    """
+    versao: int
+    leituras: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    atualizado_em: datetime = None
+    erro: str = None
+
+    def leitura(self, nome):
+        """Retorna a última leitura do sensor (ou None se não houver)."""
+        return self.leituras.get(nome)
+
+
+def _mesmo_valor(a, b):
+    # Valores vazios (None/NaN/NaT) são iguais entre si
+    vazio_a, vazio_b = pd.isna(a), pd.isna(b)
+    if vazio_a or vazio_b:
+        return bool(vazio_a and vazio_b)
+    return bool(a == b)
+
+
+def mesmas_leituras(a, b):
+    """True se os dois conjuntos de leituras são iguais (NaN igual a NaN)."""
+    if a.keys() != b.keys():
+        return False
+    for nome, linha in a.items():
+        outra = b[nome]
+        if linha.keys() != outra.keys():
+            return False
+        if not all(_mesmo_valor(valor, outra[chave]) for chave, valor in linha.items()):
+            return False
+    return True
+
+
+class SnapshotService:
+    """
+    Mantém o snapshot das últimas leituras, atualizado por uma thread em background.
+    """
+
+    def __init__(self, query, intervalo=20, compartilhado=None):
+        self.query = query
+        self.intervalo = intervalo
+        # Nome do segmento compartilhado entre os workers (None = só local)
+        self._segmento = SegmentoCompartilhado(compartilhado) if compartilhado else None
+        self._snapshot = Snapshot(versao=0)
+        self._versao_segmento = None
+        self._lock = threading.Lock()
+        self._tarefa = TarefaPeriodica(self.atualizar, intervalo, nome="snapshot-refresher")
+
+    def iniciar(self):
+        """Inicia a thread de atualização (apenas uma vez por processo)."""
+        self._tarefa.iniciar()
+
+    def parar(self):
+        """Sinaliza para a thread de atualização encerrar."""
+        self._tarefa.parar()
+
+    def atual(self):
+        """
+        Retorna o snapshot mais recente. Se ainda não houve nenhuma carga
+        (ex.: primeira requisição logo após o boot), faz uma carga síncrona.
+        """
+        if self._segmento is not None and not lideranca.e_lider():
+            self._ler_compartilhado()
+        snapshot = self._snapshot
+        if snapshot.versao == 0 and snapshot.erro is None:
+            self.atualizar()
+            snapshot = self._snapshot
+        return snapshot
+
+    def versao_publicada(self):
+        """Versão do segmento compartilhado (só o cabeçalho), ou None sem segmento."""
+        return None if self._segmento is None else self._segmento.versao()
+
+    def _ler_compartilhado(self):
+        # Adota o snapshot publicado pelo líder (mesma versão em todos os workers);
+        # só desserializa quando a versão do segmento muda
+        versao = self._segmento.versao()
+        if versao == 0:
+            return False
+        if versao != self._versao_segmento:
+            versao, publicado, _ = self._segmento.ler()
+            self._versao_segmento = versao
+            self._snapshot = Snapshot(
+                versao=publicado["versao"],
+                leituras=MappingProxyType({
+                    nome: MappingProxyType(linha) for nome, linha in publicado["leituras"].items()
+                }),
+                atualizado_em=publicado["atualizado_em"],
+                erro=publicado["erro"],
+            )
+        return True
+
+    def _publicar(self):
+        snapshot = self._snapshot
+        try:
+            self._versao_segmento = None
+            self._segmento.publicar({
+                "versao": snapshot.versao,
+                "leituras": {nome: dict(linha) for nome, linha in snapshot.leituras.items()},
+                "atualizado_em": snapshot.atualizado_em,
+                "erro": snapshot.erro,
+            })
+            self._versao_segmento = self._segmento.versao()
+        except Exception as e:
+            print(f"[snapshot] Erro ao publicar: {e}")
+
+    def atualizar(self):
+        """Busca as últimas leituras no banco e publica um novo snapshot."""
+        if self._segmento is not None and not lideranca.e_lider():
+            # Só consulta o banco se o líder ainda não publicou nada
+            if self._ler_compartilhado():
+                return self._snapshot
+        try:
+            df = normalizar_numeros(ler_sql(self.query))
+            leituras = {
+                str(linha["nome"]): MappingProxyType(linha)
+                for linha in df.to_dict("records")
+            }
+            with self._lock:
+                anterior = self._snapshot
+                mudou = anterior.versao == 0 or not mesmas_leituras(anterior.leituras, leituras)
+                self._snapshot = Snapshot(
+                    versao=anterior.versao + 1 if mudou else anterior.versao,
+                    leituras=MappingProxyType(leituras) if mudou else anterior.leituras,
+                    atualizado_em=agora(),
+                )
+        except Exception as e:
+            print(f"[snapshot] Erro ao atualizar: {e}")
+            # Mantém as últimas leituras válidas e apenas registra o erro
+            with self._lock:
+                anterior = self._snapshot
+                self._snapshot = Snapshot(
+                    versao=anterior.versao,
+                    leituras=anterior.leituras,
+                    atualizado_em=anterior.atualizado_em,
+                    erro=str(e),
+                )
+        if self._segmento is not None and lideranca.e_lider():
+            self._publicar()
+        return self._snapshot
@@ -0,0 +1,23 @@
+-- Índices usados pelas consultas do dashboard.
+--
+-- Todas as consultas filtram por sensor (nome) e ordenam/filtram por data.
+-- Com este índice, a contagem de "Registros hoje", as últimas leituras e o
+-- histórico das últimas 24h viram buscas por faixa no índice em vez de
+-- varreduras completas da tabela dados_sensores.
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes
+    WHERE name = 'IX_dados_sensores_nome_data'
+      AND object_id = OBJECT_ID('dbo.dados_sensores')
+)
+    CREATE NONCLUSTERED INDEX IX_dados_sensores_nome_data
+        ON dbo.dados_sensores (nome, data DESC, hora_formatada DESC);
+
+-- Consulta de novidades das atualizações em tempo real (eventos.py):
+-- SELECT MAX(data) a cada segundo vira uma busca de uma linha neste índice.
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes
+    WHERE name = 'IX_dados_sensores_data'
+      AND object_id = OBJECT_ID('dbo.dados_sensores')
+)
+    CREATE NONCLUSTERED INDEX IX_dados_sensores_data
+        ON dbo.dados_sensores (data DESC);
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+# Execução de tarefas periódicas em background (uma thread por tarefa).
+import threading
+import time
+
+
+class TarefaPeriodica:
+    """
+    Executa `funcao` a cada `intervalo` segundos numa thread daemon.
+    O intervalo é contado a partir do início de cada execução.
+    """
+
+    def __init__(self, funcao, intervalo, nome="tarefa-periodica"):
+        self.funcao = funcao
+        self.intervalo = intervalo
+        self.nome = nome
+        self._lock = threading.Lock()
+        self._thread = None
+        self._parar = threading.Event()
+
+    def iniciar(self):
+        """Inicia a thread (apenas uma vez por processo)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._loop, name=self.nome, daemon=True)
+            self._thread.start()
+
+    def parar(self):
+        """Sinaliza para a thread encerrar."""
+        self._parar.set()
+
+    def _loop(self):
+        while not self._parar.is_set():
+            inicio = time.monotonic()
+            try:
+                self.funcao()
+            except Exception as e:
+                print(f"[{self.nome}] Erro: {e}")
+            espera = max(0.0, self.intervalo - (time.monotonic() - inicio))
+            self._parar.wait(espera)